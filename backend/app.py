@@ -2343,21 +2343,26 @@ def create_network_topology_graph(graph_data):
         print(f"Error creating network topology graph: {str(e)}")
         return None
 
+# Power quality PDF styles, built once when the app starts; reports only read
+# them, so every request shares them instead of rebuilding the style sheet
+PQ_PDF_STYLES = getSampleStyleSheet()
+PQ_PDF_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=PQ_PDF_STYLES['Heading1'],
+    fontSize=18,
+    spaceAfter=30,
+    alignment=TA_CENTER
+)
+
 def generate_power_quality_pdf(report, nmd_data, consumers_data, transformer_number='T-001'):
     """Generate a comprehensive PDF report for power quality analysis"""
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
+    styles = PQ_PDF_STYLES
     story = []
     
     # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=TA_CENTER
-    )
+    title_style = PQ_PDF_TITLE_STYLE
     story.append(Paragraph("Power Quality Analysis Report", title_style))
     story.append(Spacer(1, 20))
     
@@ -3314,7 +3319,8 @@ def nmd_analysis_visualization():
         session_id = data.get('session_id', 'default')
         customer_id = data.get('customer_id')
         feeder_id = data.get('feeder_id', 'FEEDER_001')
-        return nmd_processor.get_visualization_data(session_id, customer_id, feeder_id)
+        output_format = request.args.get('format', 'json')
+        return nmd_processor.get_visualization_data(session_id, customer_id, feeder_id, output_format)
     except Exception as e:
         return jsonify({'error': f'Error generating visualization: {str(e)}'}), 500
 
@@ -3332,7 +3338,8 @@ def nmd_analysis_corrected_data():
     """Get corrected customer data with proper phase labels"""
     try:
         session_id = request.args.get('session_id', 'default')
-        return nmd_processor.generate_corrected_data(session_id)
+        layout = request.args.get('layout', 'records')
+        return nmd_processor.generate_corrected_data(session_id, layout)
     except Exception as e:
         return jsonify({'error': f'Error generating corrected data: {str(e)}'}), 500
 
@@ -3444,7 +3451,7 @@ def generate_glm_model():
             return jsonify({'error': 'Feeder and customer data required'}), 400
         
         # Extract data
-        feeder_df = session['feeder_data']['dataframe']
+        feeder_df = nmd_processor.load_feeder_dataframe(session['feeder_data'])
         customer_data_dict = {cid: cdata['dataframe'] 
                              for cid, cdata in session['customer_data'].items()}
         assignments = session['analysis_results']['assignments']
@@ -3575,7 +3582,7 @@ def analyze_load_balance():
             return jsonify({'error': 'Please run NMD analysis first'}), 400
         
         # Extract data
-        feeder_df = session.get('feeder_data', {}).get('dataframe')
+        feeder_df = nmd_processor.load_feeder_dataframe(session['feeder_data']) if 'feeder_data' in session else None
         customer_data_dict = {cid: cdata['dataframe'] 
                              for cid, cdata in session.get('customer_data', {}).items()}
         assignments = session['analysis_results']['assignments']
@@ -3618,7 +3625,7 @@ def suggest_load_balancing():
             return jsonify({'error': 'Please run NMD analysis first'}), 400
         
         # Extract data
-        feeder_df = session.get('feeder_data', {}).get('dataframe')
+        feeder_df = nmd_processor.load_feeder_dataframe(session['feeder_data']) if 'feeder_data' in session else None
         customer_data_dict = {cid: cdata['dataframe'] 
                              for cid, cdata in session.get('customer_data', {}).items()}
         assignments = session['analysis_results']['assignments']
@@ -3687,7 +3694,7 @@ def forecast_load():
     try:
         data = request.get_json()
         session_id = data.get('session_id', 'default')
-        model_type = data.get('model_type', 'prophet')  # arima, prophet, or lstm
+        model_type = data.get('model_type', 'prophet')  # arima, prophet, mstl, or lstm
         forecast_periods = data.get('forecast_periods', 168)  # 1 week hourly
         customer_id = data.get('customer_id')
         feeder_id = data.get('feeder_id')
@@ -3726,6 +3733,8 @@ def forecast_load():
                 result = load_forecaster.forecast_with_arima(customer_df, forecast_periods)
             elif model_type == 'prophet':
                 result = load_forecaster.forecast_with_prophet(customer_df, forecast_periods)
+            elif model_type == 'mstl':
+                result = load_forecaster.forecast_with_mstl(customer_df, forecast_periods)
             elif model_type == 'lstm':
                 result = load_forecaster.forecast_with_lstm(customer_df, forecast_periods)
             else:
@@ -3743,7 +3752,8 @@ def forecast_load():
                 customer_data_dict,
                 feeder_id,
                 model_type,
-                forecast_periods
+                forecast_periods,
+                session_id=session_id
             )
         
         else:
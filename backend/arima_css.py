@@ -0,0 +1,153 @@
+"""
+ARIMA Estimation Module
+Fits ARIMA models by conditional sum of squares (CSS)
+"""
+
+import numpy as np
+from dataclasses import dataclass
+from typing import Tuple
+from scipy.optimize import minimize
+from scipy.signal import lfilter
+
+
+@dataclass
+class ArimaFit:
+    """Fitted ARIMA(p, d, q) model with the statsmodels-style results API used here"""
+    order: Tuple[int, int, int]
+    mean: float
+    ar: np.ndarray
+    ma: np.ndarray
+    endog: np.ndarray
+    resid: np.ndarray
+    
+    @property
+    def params(self) -> np.ndarray:
+        """Mean (zero when differenced), AR then MA coefficients"""
+        return np.concatenate([[self.mean], self.ar, self.ma])
+    
+    @property
+    def fittedvalues(self) -> np.ndarray:
+        """One-step-ahead in-sample predictions (first d observations dropped)"""
+        d = self.order[1]
+        return self.endog[d:] - self.resid
+    
+    def apply(self, endog: np.ndarray) -> 'ArimaFit':
+        """Filter a new series with these parameters, without re-estimating them"""
+        y = np.asarray(endog, dtype=float)
+        w = np.diff(y, n=self.order[1])
+        
+        return ArimaFit(
+            order=self.order,
+            mean=self.mean,
+            ar=self.ar,
+            ma=self.ma,
+            endog=y,
+            resid=_css_residuals(w, self.mean, self.ar, self.ma)
+        )
+    
+    def forecast(self, steps: int = 1) -> np.ndarray:
+        """Forecast ``steps`` periods past the end of the series"""
+        p, d, q = self.order
+        
+        # Differenced series and innovations, extended with zero future shocks
+        w = np.diff(self.endog, n=d) - self.mean
+        history = np.concatenate([w[len(w) - p:] if p else [], np.zeros(steps)])
+        shocks = np.concatenate([self.resid[len(self.resid) - q:] if q else [], np.zeros(steps)])
+        
+        for h in range(steps):
+            ar_term = self.ar @ history[h:h + p][::-1] if p else 0.0
+            ma_term = self.ma @ shocks[h:h + q][::-1] if q else 0.0
+            history[p + h] = ar_term + ma_term
+        
+        forecast = history[p:] + self.mean
+        
+        # Undo the differencing, innermost level first
+        for level in range(d, 0, -1):
+            last_value = np.diff(self.endog, n=level - 1)[-1]
+            forecast = last_value + np.cumsum(forecast)
+        
+        return forecast
+
+
+def _constrain_stationary(unconstrained: np.ndarray) -> np.ndarray:
+    """
+    Map unconstrained values to stationary AR coefficients
+    
+    Values are squashed into partial autocorrelations in (-1, 1) and expanded
+    with the Durbin-Levinson recursion, so any input gives a stationary
+    polynomial.
+    """
+    coefs = np.empty(0)
+    for r in np.tanh(unconstrained):
+        coefs = np.append(coefs - r * coefs[::-1], r)
+    return coefs
+
+
+def _unpack(params: np.ndarray, p: int, include_mean: bool) -> Tuple[float, np.ndarray, np.ndarray]:
+    """Split optimizer parameters into (mean, AR, MA) coefficients"""
+    offset = 1 if include_mean else 0
+    mean = params[0] if include_mean else 0.0
+    ar = _constrain_stationary(params[offset:offset + p])
+    # An invertible MA polynomial is a stationary AR polynomial with the sign flipped
+    ma = -_constrain_stationary(params[offset + p:])
+    return mean, ar, ma
+
+
+def _css_residuals(w: np.ndarray, mean: float, ar: np.ndarray, ma: np.ndarray) -> np.ndarray:
+    """ARMA innovations of ``w`` given the coefficients, from a zero initial state"""
+    return lfilter(np.r_[1.0, -ar], np.r_[1.0, ma], w - mean)
+
+
+def fit_arima_css(endog: np.ndarray, order: Tuple[int, int, int]) -> ArimaFit:
+    """
+    Fit an ARIMA(p, d, q) model by conditional sum of squares
+    
+    The ARMA recursion runs inside scipy.signal.lfilter, so every objective
+    evaluation is a single compiled pass over the series. Like statsmodels'
+    ARIMA, a mean term is estimated only when d == 0.
+    
+    Args:
+        endog: Observed series
+        order: (p, d, q) model order
+    
+    Returns:
+        ArimaFit with forecast() and fittedvalues
+    
+    Raises:
+        ValueError: If the series is too short or the fit does not produce
+            finite estimates
+    """
+    p, d, q = order
+    y = np.asarray(endog, dtype=float)
+    w = np.diff(y, n=d)
+    
+    if len(w) <= p + q + 1:
+        raise ValueError('Series too short for the requested ARIMA order')
+    
+    # Work on a standardized series so all parameters share one scale
+    include_mean = d == 0
+    center = w.mean() if include_mean else 0.0
+    scale = w.std() or 1.0
+    z = (w - center) / scale
+    
+    def objective(params):
+        resid = _css_residuals(z, *_unpack(params, p, include_mean))[p:]
+        return resid @ resid / len(resid)
+    
+    x0 = np.zeros(int(include_mean) + p + q)
+    result = minimize(objective, x0, method='L-BFGS-B')
+    
+    if not np.all(np.isfinite(result.x)) or not np.isfinite(result.fun):
+        raise ValueError('ARIMA CSS estimation did not converge')
+    
+    mean, ar, ma = _unpack(result.x, p, include_mean)
+    mean = center + mean * scale if include_mean else 0.0
+    
+    return ArimaFit(
+        order=(p, d, q),
+        mean=mean,
+        ar=ar,
+        ma=ma,
+        endog=y,
+        resid=_css_residuals(w, mean, ar, ma)
+    )
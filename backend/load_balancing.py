@@ -8,6 +8,31 @@ import numpy as np
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass
 import json
+import warnings
+
+
+# Phase order used for per-phase arrays (column index = position)
+PHASE_NAMES = ('Phase A', 'Phase B', 'Phase C')
+PHASE_ID = {name: i for i, name in enumerate(PHASE_NAMES)}
+
+# Balancing moves: maximum suggested per feeder and the load grid (kW)
+# used when searching for the best set of customers to move
+MAX_MOVES_PER_FEEDER = 5
+LOAD_RESOLUTION_KW = 0.1
+
+# Substrings (matched against upper-cased column names) identifying each
+# transformer data column; the first matching column wins
+TRANSFORMER_COLUMN_PATTERNS = {
+    'current_a': ('PHASE_A', 'CURRENT'),
+    'current_b': ('PHASE_B', 'CURRENT'),
+    'current_c': ('PHASE_C', 'CURRENT'),
+    'voltage_a': ('PHASE_A', 'VOLTAGE'),
+    'voltage_b': ('PHASE_B', 'VOLTAGE'),
+    'voltage_c': ('PHASE_C', 'VOLTAGE'),
+    'load_kw': ('IMPORT_KW', 'AVG'),
+    'load_kva': ('IMPORT_KVA', 'AVG'),
+    'power_factor': ('POWER_FACTOR',),
+}
 
 
 @dataclass
@@ -23,6 +48,126 @@ class PhaseLoad:
     max_voltage: float
 
 
+@dataclass(frozen=True, slots=True)
+class FeederLoads:
+    """Per-phase loads of one feeder; array positions follow PHASE_NAMES"""
+    kw: np.ndarray
+    kvar: np.ndarray
+    customer_count: np.ndarray
+    avg_voltage: np.ndarray
+    customers: List[List[str]]
+    customer_loads_kw: List[np.ndarray]
+
+
+def _json_default(obj):
+    """json.dumps fallback for numpy scalars and arrays"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def _imbalance_kernel(loads: np.ndarray) -> float:
+    """
+    Maximum deviation from the mean load, relative to the mean
+    
+    Args:
+        loads: Array of per-phase loads
+        
+    Returns:
+        Imbalance as a decimal (0.0 when the mean load is zero)
+    """
+    return float(_feeder_imbalances(loads.reshape(1, -1))[0])
+
+
+def _feeder_imbalances(loads: np.ndarray) -> np.ndarray:
+    """
+    Imbalance of many feeders at once
+    
+    Args:
+        loads: (feeders, phases) array of per-phase loads
+        
+    Returns:
+        Array with one imbalance per feeder, as in _imbalance_kernel
+    """
+    avg_load = loads.mean(axis=1)
+    max_deviation = np.abs(loads - avg_load[:, None]).max(axis=1, initial=0.0)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(avg_load == 0, 0.0, max_deviation / avg_load)
+
+
+def _stack_feeder_kw(phase_loads_by_feeder: Dict[str, 'FeederLoads']) -> np.ndarray:
+    """(feeders, phases) kW matrix in phase_loads_by_feeder order"""
+    return np.array(
+        [loads.kw for loads in phase_loads_by_feeder.values()], dtype=float
+    ).reshape(-1, len(PHASE_NAMES))
+
+
+def _closest_subset(weights: np.ndarray, target: int, max_items: int) -> List[int]:
+    """
+    Pick at most ``max_items`` positive weights whose sum is closest to ``target``
+    
+    Bit-parallel subset-sum: bit ``w`` of ``reachable[k]`` is set when some
+    ``k`` weights sum to ``w``, and each weight updates every ``k`` with a
+    single shift. Sums are capped at ``2 * target``; beyond that a subset is
+    further from the target than choosing nothing.
+    
+    Args:
+        weights: Integer weights (non-positive weights are never chosen)
+        target: Integer target sum
+        max_items: Maximum number of weights to choose
+        
+    Returns:
+        Indices of the chosen weights in ascending order; empty when no
+        non-empty subset is closer to the target than the empty one
+    """
+    if target <= 0 or max_items <= 0:
+        return []
+    
+    limit = 2 * target
+    mask = (1 << (limit + 1)) - 1
+    reachable = [1] + [0] * max_items
+    history = []
+    
+    for weight in weights:
+        history.append(list(reachable))
+        if 0 < weight <= limit:
+            for k in range(max_items, 0, -1):
+                reachable[k] |= (reachable[k - 1] << int(weight)) & mask
+    
+    # Closest reachable sum, preferring fewer items on ties
+    best = None
+    for distance in range(target):
+        for k in range(1, max_items + 1):
+            for total in (target - distance, target + distance):
+                if reachable[k] >> total & 1:
+                    best = (k, total)
+                    break
+            if best:
+                break
+        if best:
+            break
+    
+    if best is None:
+        return []
+    
+    # Walk back through the items: an item is needed exactly when the
+    # (count, sum) state was not reachable without it
+    k, total = best
+    chosen = []
+    for i in range(len(weights) - 1, -1, -1):
+        if k == 0:
+            break
+        if not history[i][k] >> total & 1:
+            chosen.append(i)
+            k -= 1
+            total -= int(weights[i])
+    
+    return chosen[::-1]
+
+
 class LoadBalancer:
     """Analyzes and optimizes load distribution across phases"""
     
@@ -37,21 +182,14 @@ class LoadBalancer:
         self.nominal_voltage = 230  # V
     
     def _to_json_safe(self, obj):
-        """Convert numpy/pandas types to JSON-serializable Python types"""
-        if obj is None or isinstance(obj, (str, int, float, bool)):
-            return obj
-        elif isinstance(obj, (np.integer, np.floating)):
-            return obj.item()
-        elif isinstance(obj, np.bool_):
-            return bool(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        elif isinstance(obj, dict):
-            return {k: self._to_json_safe(v) for k, v in obj.items()}
-        elif isinstance(obj, (list, tuple)):
-            return [self._to_json_safe(item) for item in obj]
-        else:
-            return obj
+        """
+        Convert numpy/pandas types to JSON-serializable Python types
+        
+        The result is round-tripped through the C-accelerated json module,
+        which walks the tree once and only calls back into Python for
+        numpy values.
+        """
+        return json.loads(json.dumps(obj, default=_json_default))
     
     def analyze_current_balance(self, feeder_data: pd.DataFrame, 
                                 customer_data: Dict[str, pd.DataFrame],
@@ -69,13 +207,14 @@ class LoadBalancer:
         Returns:
             Dictionary containing balance analysis results
         """
-        # Organize data by feeder and phase
-        feeder_structure = self._organize_by_feeder_and_phase(assignments, customer_data)
+        # Aggregate customer loads by feeder and phase
+        phase_table, _ = self._build_phase_table(assignments, customer_data)
+        phase_loads_by_feeder = self._calculate_phase_loads(phase_table)
         
         # Analyze each feeder
         feeder_analysis = {}
         overall_stats = {
-            'total_feeders': len(feeder_structure),
+            'total_feeders': len(phase_loads_by_feeder),
             'total_customers': len(assignments),
             'imbalanced_feeders': [],
             'balanced_feeders': []
@@ -87,26 +226,26 @@ class LoadBalancer:
             transformer_analysis = self._analyze_transformer_load(transformer_data)
             overall_stats['transformer_analysis'] = transformer_analysis
         
-        for feeder_id, phases in feeder_structure.items():
-            phase_loads = self._calculate_phase_loads(phases, customer_data)
-            imbalance = self._calculate_imbalance(phase_loads)
-            
+        # Imbalance of every feeder in one vectorized pass
+        imbalances = _feeder_imbalances(_stack_feeder_kw(phase_loads_by_feeder))
+        
+        for (feeder_id, loads), imbalance in zip(phase_loads_by_feeder.items(), imbalances):
             feeder_analysis[feeder_id] = {
                 'phase_loads': [
                     {
-                        'phase': pl.phase_name,
-                        'total_kw': pl.total_load_kw,
-                        'total_kvar': pl.total_reactive_kvar,
-                        'customer_count': pl.customer_count,
-                        'customers': pl.customers,
-                        'avg_voltage': pl.avg_voltage
+                        'phase': phase_name,
+                        'total_kw': loads.kw[i],
+                        'total_kvar': loads.kvar[i],
+                        'customer_count': loads.customer_count[i],
+                        'customers': loads.customers[i],
+                        'avg_voltage': loads.avg_voltage[i]
                     }
-                    for pl in phase_loads
+                    for i, phase_name in enumerate(PHASE_NAMES)
                 ],
                 'imbalance_percentage': imbalance * 100,
                 'is_balanced': imbalance <= self.max_imbalance_threshold,
-                'total_load_kw': sum(pl.total_load_kw for pl in phase_loads),
-                'total_customers': sum(pl.customer_count for pl in phase_loads)
+                'total_load_kw': loads.kw.sum(),
+                'total_customers': int(loads.customer_count.sum())
             }
             
             if imbalance > self.max_imbalance_threshold:
@@ -137,29 +276,27 @@ class LoadBalancer:
         Returns:
             Dictionary containing suggested moves
         """
-        # Organize data
-        feeder_structure = self._organize_by_feeder_and_phase(assignments, customer_data)
+        # Aggregate customer loads by feeder and phase. Phase loads and
+        # imbalances are computed once per feeder and reused by the
+        # improvement and balanced-feeder estimates below
+        phase_table, _ = self._build_phase_table(assignments, customer_data)
+        phase_loads_by_feeder = self._calculate_phase_loads(phase_table)
         
         suggestions = []
         
-        for feeder_id, phases in feeder_structure.items():
-            phase_loads = self._calculate_phase_loads(phases, customer_data)
-            imbalance = self._calculate_imbalance(phase_loads)
-            
+        imbalances = _feeder_imbalances(_stack_feeder_kw(phase_loads_by_feeder))
+        
+        for (feeder_id, loads), imbalance in zip(phase_loads_by_feeder.items(), imbalances):
             if imbalance > self.max_imbalance_threshold:
-                # Find best moves to balance this feeder
-                moves = self._find_optimal_moves(feeder_id, phase_loads, customer_data)
+                # Find best moves to balance this feeder and score them
+                # against the feeder's already computed loads and imbalance
+                moves = self._find_optimal_moves(feeder_id, loads)
+                for move in moves:
+                    move['expected_improvement'] = self._calculate_improvement(
+                        move, loads.kw, imbalance
+                    )
                 suggestions.extend(moves)
         
-        # Calculate expected improvements
-        for suggestion in suggestions:
-            improvement = self._calculate_improvement(
-                suggestion,
-                feeder_structure,
-                customer_data
-            )
-            suggestion['expected_improvement'] = improvement
-        
         # Sort by expected improvement
         suggestions.sort(key=lambda x: x['expected_improvement']['imbalance_reduction'], 
                         reverse=True)
@@ -168,7 +305,7 @@ class LoadBalancer:
             'suggestions': suggestions,
             'total_suggestions': len(suggestions),
             'estimated_balanced_feeders': self._estimate_balanced_feeders(
-                suggestions, feeder_structure, customer_data
+                suggestions, dict(zip(phase_loads_by_feeder, imbalances))
             )
         }
         
@@ -189,29 +326,52 @@ class LoadBalancer:
         Returns:
             Comparison of before and after balance
         """
-        # Create new assignments with moves applied
-        new_assignments = original_assignments.copy()
-        
+        # Per-phase totals are built once for the original assignments and
+        # the moves are then applied to a copy as deltas, so only the moved
+        # customers are touched
+        phase_table, customer_stats = self._build_phase_table(original_assignments, customer_data)
+        before_totals = self._accumulate_feeder_totals(phase_table)
+        after_totals = {feeder_id: totals.copy() for feeder_id, totals in before_totals.items()}
+        
+        assignment_index = {}
+        for i, assignment in enumerate(original_assignments):
+            assignment_index.setdefault(assignment['customer_id'], i)
+        
+        current_phases = {}
         for move in balancing_moves:
             customer_id = move['customer_id']
-            new_phase = move['to_phase']
+            new_phase = PHASE_ID[move['to_phase']]
             
-            # Find and update assignment
-            for i, assignment in enumerate(new_assignments):
-                if assignment['customer_id'] == customer_id:
-                    # Update phase assignment
-                    if 'phase_assignments' in assignment:
-                        for pa in assignment['phase_assignments']:
-                            pa['assigned_feeder_phase'] = new_phase
-                    new_assignments[i] = assignment
-                    break
+            # Find the assignment being moved
+            i = assignment_index.get(customer_id)
+            if i is None:
+                continue
+            
+            assignment = original_assignments[i]
+            if 'phase_assignments' not in assignment:
+                continue
+            
+            # Every phase assignment of the customer moves to the new phase;
+            # phases are tracked as PHASE_NAMES indices
+            if customer_id not in current_phases:
+                current_phases[customer_id] = np.array(
+                    [PHASE_ID[pa['assigned_feeder_phase']] for pa in assignment['phase_assignments']],
+                    dtype=np.int8
+                )
+            old_phases = current_phases[customer_id]
+            contribution = self._customer_contribution(customer_stats, customer_id)
+            totals = after_totals[assignment['assigned_feeder']]
+            
+            for phase in old_phases:
+                totals[:, phase] -= contribution
+            for _ in old_phases:
+                totals[:, new_phase] += contribution
+            
+            current_phases[customer_id] = np.full_like(old_phases, new_phase)
         
         # Calculate before and after stats
-        before_structure = self._organize_by_feeder_and_phase(original_assignments, customer_data)
-        after_structure = self._organize_by_feeder_and_phase(new_assignments, customer_data)
-        
-        before_stats = self._calculate_overall_stats(before_structure, customer_data)
-        after_stats = self._calculate_overall_stats(after_structure, customer_data)
+        before_stats = self._calculate_overall_stats(before_totals)
+        after_stats = self._calculate_overall_stats(after_totals)
         
         result = {
             'before': before_stats,
@@ -260,195 +420,303 @@ class LoadBalancer:
                               if sum(pl.total_load_kw for pl in phase_loads) > 0 else 0
         }
     
-    def _organize_by_feeder_and_phase(self, assignments: List[Dict],
-                                     customer_data: Dict[str, pd.DataFrame]) -> Dict:
-        """Organize customers by feeder and phase"""
-        feeder_structure = {}
+    def _organize_by_feeder_and_phase(self, assignments: List[Dict]) -> pd.DataFrame:
+        """
+        Flatten assignments into one row per customer phase assignment
+        
+        Customers without phase assignments are placed on Phase A.
+        
+        Returns:
+            Long-form DataFrame with customer_id, feeder_id and an int8
+            phase_id column (index into PHASE_NAMES, -1 for unknown phases)
+        """
+        customer_ids = []
+        feeder_ids = []
+        phase_ids = []
         
         for assignment in assignments:
-            customer_id = assignment['customer_id']
-            feeder_id = assignment['assigned_feeder']
             phase_assignments = assignment.get('phase_assignments', [])
-            
-            if feeder_id not in feeder_structure:
-                feeder_structure[feeder_id] = {
-                    'Phase A': [],
-                    'Phase B': [],
-                    'Phase C': []
-                }
-            
             if phase_assignments:
-                for phase_assignment in phase_assignments:
-                    assigned_phase = phase_assignment['assigned_feeder_phase']
-                    feeder_structure[feeder_id][assigned_phase].append({
-                        'customer_id': customer_id,
-                        'data': customer_data.get(customer_id)
-                    })
+                assigned_phases = [pa['assigned_feeder_phase'] for pa in phase_assignments]
             else:
-                feeder_structure[feeder_id]['Phase A'].append({
-                    'customer_id': customer_id,
-                    'data': customer_data.get(customer_id)
-                })
-        
-        return feeder_structure
-    
-    def _calculate_phase_loads(self, phases: Dict[str, List], 
-                               customer_data: Dict[str, pd.DataFrame]) -> List[PhaseLoad]:
-        """Calculate loads for each phase"""
-        phase_loads = []
-        
-        for phase_name, customers in phases.items():
-            total_kw = 0
-            total_kvar = 0
-            voltages = []
-            customer_ids = []
-            
-            for customer_info in customers:
-                customer_id = customer_info['customer_id']
-                customer_ids.append(customer_id)
-                
-                df = customer_data.get(customer_id)
-                if df is not None and len(df) > 0:
-                    # Extract power if available
-                    power_cols = [col for col in df.columns if 'KW' in col.upper()]
-                    if power_cols:
-                        avg_kw = pd.to_numeric(df[power_cols[0]], errors='coerce').mean()
-                        if not pd.isna(avg_kw):
-                            total_kw += avg_kw
-                    else:
-                        total_kw += 5.0  # Default load
-                    
-                    # Extract reactive power if available
-                    reactive_cols = [col for col in df.columns if 'KVAR' in col.upper()]
-                    if reactive_cols:
-                        avg_kvar = pd.to_numeric(df[reactive_cols[0]], errors='coerce').mean()
-                        if not pd.isna(avg_kvar):
-                            total_kvar += avg_kvar
-                    else:
-                        total_kvar += 1.0  # Default reactive power
-                    
-                    # Extract voltage if available
-                    voltage_cols = [col for col in df.columns if 'VOLTAGE' in col.upper()]
-                    if voltage_cols:
-                        avg_voltage = pd.to_numeric(df[voltage_cols[0]], errors='coerce').mean()
-                        if not pd.isna(avg_voltage):
-                            voltages.append(avg_voltage)
-                else:
-                    total_kw += 5.0
-                    total_kvar += 1.0
-            
-            avg_voltage = np.mean(voltages) if voltages else self.nominal_voltage
-            min_voltage = np.min(voltages) if voltages else self.nominal_voltage
-            max_voltage = np.max(voltages) if voltages else self.nominal_voltage
+                assigned_phases = ['Phase A']
             
-            phase_loads.append(PhaseLoad(
-                phase_name=phase_name,
-                total_load_kw=total_kw,
-                total_reactive_kvar=total_kvar,
-                customer_count=len(customers),
-                customers=customer_ids,
-                avg_voltage=avg_voltage,
-                min_voltage=min_voltage,
-                max_voltage=max_voltage
-            ))
+            for assigned_phase in assigned_phases:
+                customer_ids.append(assignment['customer_id'])
+                feeder_ids.append(assignment['assigned_feeder'])
+                phase_ids.append(PHASE_ID.get(assigned_phase, -1))
+        
+        return pd.DataFrame({
+            'customer_id': customer_ids,
+            'feeder_id': feeder_ids,
+            'phase_id': np.array(phase_ids, dtype=np.int8)
+        })
+    
+    def _resolve_columns(self, df: pd.DataFrame) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """
+        Find the kW, kVAR and voltage columns of a customer DataFrame
         
-        return phase_loads
+        Each is the first column whose upper-cased name contains 'KW',
+        'KVAR' or 'VOLTAGE' respectively (None when absent). The result is
+        cached in ``df.attrs['load_cols']`` together with the column labels
+        it was resolved from, so repeated calls on the same frame skip the
+        scan and frames derived with different columns are re-resolved.
+        """
+        columns = tuple(df.columns)
+        cached = df.attrs.get('load_cols')
+        if cached is not None and cached[0] == columns:
+            return cached[1]
+        
+        kw_col = kvar_col = voltage_col = None
+        for col in columns:
+            col_upper = str(col).upper()
+            if kw_col is None and 'KW' in col_upper:
+                kw_col = col
+            if kvar_col is None and 'KVAR' in col_upper:
+                kvar_col = col
+            if voltage_col is None and 'VOLTAGE' in col_upper:
+                voltage_col = col
+        
+        resolved = (kw_col, kvar_col, voltage_col)
+        df.attrs['load_cols'] = (columns, resolved)
+        return resolved
     
-    def _calculate_imbalance(self, phase_loads: List[PhaseLoad]) -> float:
+    def _customer_load(self, df: Optional[pd.DataFrame]) -> Tuple[float, float, float]:
         """
-        Calculate load imbalance across phases
+        Average load of a single customer
         
         Returns:
-            Imbalance as a decimal (0.0 to 1.0)
+            Tuple of (kW, kVAR, voltage). Customers without data default to
+            5 kW / 1 kVAR; voltage is NaN when unavailable.
+        """
+        if df is None or len(df) == 0:
+            return 5.0, 1.0, np.nan
+        
+        kw_col, kvar_col, voltage_col = self._resolve_columns(df)
+        
+        # Extract power if available
+        customer_kw = 5.0  # Default load
+        if kw_col is not None:
+            avg_kw = pd.to_numeric(df[kw_col], errors='coerce').mean()
+            customer_kw = 0.0 if pd.isna(avg_kw) else avg_kw
+        
+        # Extract reactive power if available
+        customer_kvar = 1.0  # Default reactive power
+        if kvar_col is not None:
+            avg_kvar = pd.to_numeric(df[kvar_col], errors='coerce').mean()
+            customer_kvar = 0.0 if pd.isna(avg_kvar) else avg_kvar
+        
+        # Extract voltage if available
+        customer_voltage = np.nan
+        if voltage_col is not None:
+            customer_voltage = pd.to_numeric(df[voltage_col], errors='coerce').mean()
+        
+        return customer_kw, customer_kvar, customer_voltage
+    
+    def _customer_stats(self, customer_ids: pd.Series,
+                        customer_data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """Average kW, kVAR and voltage of each customer, indexed by customer_id"""
+        unique_ids = pd.unique(customer_ids)
+        loads = [self._customer_load(customer_data.get(customer_id)) for customer_id in unique_ids]
+        
+        return pd.DataFrame(
+            np.array(loads, dtype=float).reshape(-1, 3),
+            index=unique_ids,
+            columns=['kw', 'kvar', 'voltage']
+        )
+    
+    def _build_phase_table(self, assignments: List[Dict],
+                           customer_data: Dict[str, pd.DataFrame]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Aggregate customer loads per feeder and phase
+        
+        Returns:
+            Tuple of (phase_table, customer_stats). phase_table is indexed by
+            (feeder_id, phase) with every phase of every feeder present, in
+            PHASE_NAMES order, and holds kw, kvar, customer_count, voltage
+            sum/count/mean, and the customers and customer_loads_kw lists.
+        """
+        assignments_df = self._organize_by_feeder_and_phase(assignments)
+        customer_stats = self._customer_stats(assignments_df['customer_id'], customer_data)
+        
+        merged = assignments_df.join(customer_stats, on='customer_id')
+        
+        # Group key = feeder code * 3 + phase code. Feeders are factorized in
+        # order of first appearance and rows are stable-sorted on the key, so
+        # every group is a contiguous run and no hashing is needed.
+        feeder_codes, feeder_ids = pd.factorize(merged['feeder_id'])
+        phase_codes = merged['phase_id'].to_numpy()
+        valid = (feeder_codes >= 0) & (phase_codes >= 0)
+        
+        n_phases = len(PHASE_NAMES)
+        n_groups = len(feeder_ids) * n_phases
+        group = (feeder_codes * n_phases + phase_codes)[valid]
+        order = np.argsort(group, kind='stable')
+        
+        kw = merged['kw'].to_numpy()[valid]
+        kvar = merged['kvar'].to_numpy()[valid]
+        voltage = merged['voltage'].to_numpy()[valid]
+        has_voltage = ~np.isnan(voltage)
+        
+        counts = np.bincount(group, minlength=n_groups)
+        voltage_sum = np.bincount(group, weights=np.where(has_voltage, voltage, 0.0), minlength=n_groups)
+        voltage_count = np.bincount(group, weights=has_voltage, minlength=n_groups)
+        
+        run_bounds = np.cumsum(counts)[:-1]
+        customers = np.split(merged['customer_id'].to_numpy()[valid][order], run_bounds)
+        customer_loads = np.split(kw[order], run_bounds)
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            voltage_mean = np.where(voltage_count > 0, voltage_sum / voltage_count, np.nan)
+        
+        # Phases without customers still take part in the balance
+        phase_table = pd.DataFrame(
+            {
+                'kw': np.bincount(group, weights=kw, minlength=n_groups),
+                'kvar': np.bincount(group, weights=kvar, minlength=n_groups),
+                'customer_count': counts,
+                'voltage_sum': voltage_sum,
+                'voltage_count': voltage_count,
+                'voltage_mean': voltage_mean,
+                'customers': [run.tolist() for run in customers],
+                'customer_loads_kw': customer_loads
+            },
+            index=pd.MultiIndex.from_product([feeder_ids, PHASE_NAMES], names=['feeder_id', 'phase'])
+        )
+        
+        return phase_table, customer_stats
+    
+    def _customer_contribution(self, customer_stats: pd.DataFrame,
+                               customer_id: str) -> np.ndarray:
         """
-        if not phase_loads:
-            return 0.0
+        Column a customer adds to a phase in the feeder totals array
         
-        loads = [pl.total_load_kw for pl in phase_loads]
-        avg_load = np.mean(loads)
+        Rows are kW, kVAR, voltage sum and voltage count.
+        """
+        customer_kw, customer_kvar, customer_voltage = customer_stats.loc[customer_id]
+        has_voltage = not np.isnan(customer_voltage)
+        
+        return np.array([
+            customer_kw,
+            customer_kvar,
+            customer_voltage if has_voltage else 0.0,
+            1.0 if has_voltage else 0.0
+        ])
+    
+    def _accumulate_feeder_totals(self, phase_table: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Per-phase load and voltage totals for every feeder
         
-        if avg_load == 0:
-            return 0.0
+        Returns:
+            Dictionary mapping feeder_id to a (4, 3) array whose rows are kW,
+            kVAR, voltage sum and voltage count and whose columns follow
+            PHASE_NAMES
+        """
+        values = phase_table[['kw', 'kvar', 'voltage_sum', 'voltage_count']].to_numpy(dtype=float)
+        feeder_ids = phase_table.index.get_level_values('feeder_id')[::len(PHASE_NAMES)]
         
-        max_deviation = max(abs(load - avg_load) for load in loads)
-        imbalance = max_deviation / avg_load
+        return {
+            feeder_id: values[i * len(PHASE_NAMES):(i + 1) * len(PHASE_NAMES)].T.copy()
+            for i, feeder_id in enumerate(feeder_ids)
+        }
+    
+    def _calculate_phase_loads(self, phase_table: pd.DataFrame) -> Dict[str, FeederLoads]:
+        """Build the per-phase load arrays of every feeder from the phase table"""
+        n_phases = len(PHASE_NAMES)
+        feeder_ids = phase_table.index.get_level_values('feeder_id')[::n_phases]
+        
+        def per_feeder(column, dtype=float):
+            return phase_table[column].to_numpy(dtype=dtype).reshape(-1, n_phases)
+        
+        kw = per_feeder('kw')
+        kvar = per_feeder('kvar')
+        customer_count = per_feeder('customer_count', dtype=int)
+        avg_voltage = np.where(per_feeder('voltage_count') > 0,
+                               per_feeder('voltage_mean'), self.nominal_voltage)
+        customers = phase_table['customers'].tolist()
+        customer_loads = phase_table['customer_loads_kw'].tolist()
         
-        return imbalance
+        return {
+            feeder_id: FeederLoads(
+                kw=kw[i],
+                kvar=kvar[i],
+                customer_count=customer_count[i],
+                avg_voltage=avg_voltage[i],
+                customers=customers[i * n_phases:(i + 1) * n_phases],
+                customer_loads_kw=customer_loads[i * n_phases:(i + 1) * n_phases]
+            )
+            for i, feeder_id in enumerate(feeder_ids)
+        }
+    
+    def _calculate_imbalance(self, loads: FeederLoads) -> float:
+        """
+        Calculate load imbalance across phases
+        
+        Returns:
+            Imbalance as a decimal (0.0 to 1.0)
+        """
+        return _imbalance_kernel(loads.kw)
     
-    def _find_optimal_moves(self, feeder_id: str, phase_loads: List[PhaseLoad],
-                           customer_data: Dict[str, pd.DataFrame]) -> List[Dict]:
+    def _find_optimal_moves(self, feeder_id: str,
+                           loads: FeederLoads) -> List[Dict]:
         """Find optimal customer moves to balance phases"""
         moves = []
         
-        # Find most loaded and least loaded phases
-        sorted_phases = sorted(phase_loads, key=lambda x: x.total_load_kw, reverse=True)
+        # Find most loaded and least loaded phases (ties resolve to the
+        # first and last phase respectively, as a stable descending sort would)
+        most = int(np.argmax(loads.kw))
+        least = len(loads.kw) - 1 - int(np.argmin(loads.kw[::-1]))
+        most_kw, least_kw = loads.kw[most], loads.kw[least]
         
-        if len(sorted_phases) < 2:
+        # Don't suggest moves if already balanced
+        if most_kw - least_kw < most_kw * 0.1:
             return moves
         
-        most_loaded = sorted_phases[0]
-        least_loaded = sorted_phases[-1]
-        
-        # Don't suggest moves if already balanced
-        if most_loaded.total_load_kw - least_loaded.total_load_kw < most_loaded.total_load_kw * 0.1:
+        # Move the set of customers (at most MAX_MOVES_PER_FEEDER) whose
+        # combined load is closest to half the gap between the two phases
+        customer_loads = loads.customer_loads_kw[most]
+        gap = most_kw - least_kw
+        selected = _closest_subset(
+            np.rint(customer_loads / LOAD_RESOLUTION_KW).astype(int),
+            int(round(gap / 2 / LOAD_RESOLUTION_KW)),
+            MAX_MOVES_PER_FEEDER
+        )
+        
+        # Rounding to the resolution grid must not turn a move into a regression
+        if not selected or abs(gap - 2 * customer_loads[selected].sum()) >= gap:
             return moves
         
-        # Find customers in most loaded phase
-        for customer_id in most_loaded.customers:
-            df = customer_data.get(customer_id)
-            customer_load = 5.0  # Default
-            
-            if df is not None and len(df) > 0:
-                power_cols = [col for col in df.columns if 'KW' in col.upper()]
-                if power_cols:
-                    avg_kw = pd.to_numeric(df[power_cols[0]], errors='coerce').mean()
-                    if not pd.isna(avg_kw):
-                        customer_load = avg_kw
-            
-            # Suggest move if it would improve balance
-            new_most_loaded = most_loaded.total_load_kw - customer_load
-            new_least_loaded = least_loaded.total_load_kw + customer_load
-            
-            if abs(new_most_loaded - new_least_loaded) < abs(most_loaded.total_load_kw - least_loaded.total_load_kw):
-                moves.append({
-                    'customer_id': customer_id,
-                    'feeder_id': feeder_id,
-                    'from_phase': most_loaded.phase_name,
-                    'to_phase': least_loaded.phase_name,
-                    'customer_load_kw': customer_load,
-                    'reason': 'Balance load distribution'
-                })
-                
-                # Limit number of suggestions per feeder
-                if len(moves) >= 5:
-                    break
+        for idx in selected:
+            moves.append({
+                'customer_id': loads.customers[most][idx],
+                'feeder_id': feeder_id,
+                'from_phase': PHASE_NAMES[most],
+                'to_phase': PHASE_NAMES[least],
+                'customer_load_kw': customer_loads[idx],
+                'reason': 'Balance load distribution'
+            })
         
         return moves
     
-    def _calculate_improvement(self, move: Dict, feeder_structure: Dict,
-                              customer_data: Dict[str, pd.DataFrame]) -> Dict[str, float]:
-        """Calculate expected improvement from a move"""
-        feeder_id = move['feeder_id']
-        phases = feeder_structure.get(feeder_id, {})
-        
-        # Calculate current imbalance
-        phase_loads_before = self._calculate_phase_loads(phases, customer_data)
-        imbalance_before = self._calculate_imbalance(phase_loads_before)
+    def _calculate_improvement(self, move: Dict, phase_kw: np.ndarray,
+                              imbalance_before: float) -> Dict[str, float]:
+        """
+        Calculate expected improvement from a move
         
+        Args:
+            move: Suggested move
+            phase_kw: Per-phase kW of the move's feeder before the move
+            imbalance_before: Current imbalance of the move's feeder
+        """
         # Simulate move
         # (Simplified - in production, create a deep copy and apply move)
         customer_load = move['customer_load_kw']
         
         # Estimate new imbalance
-        from_phase_load = next((pl.total_load_kw for pl in phase_loads_before 
-                               if pl.phase_name == move['from_phase']), 0)
-        to_phase_load = next((pl.total_load_kw for pl in phase_loads_before 
-                             if pl.phase_name == move['to_phase']), 0)
-        
-        new_from = from_phase_load - customer_load
-        new_to = to_phase_load + customer_load
+        new_from = phase_kw[PHASE_ID[move['from_phase']]] - customer_load
+        new_to = phase_kw[PHASE_ID[move['to_phase']]] + customer_load
         
-        avg_load = np.mean([pl.total_load_kw for pl in phase_loads_before])
+        avg_load = phase_kw.mean()
         if avg_load > 0:
             max_deviation_after = max(abs(new_from - avg_load), abs(new_to - avg_load))
             imbalance_after = max_deviation_after / avg_load
@@ -461,27 +729,36 @@ class LoadBalancer:
             'imbalance_reduction': imbalance_before - imbalance_after
         }
     
-    def _calculate_overall_stats(self, feeder_structure: Dict,
-                                customer_data: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
-        """Calculate overall statistics for all feeders"""
-        total_imbalance = 0
-        total_feeders = len(feeder_structure)
-        total_load = 0
-        voltages = []
-        
-        for feeder_id, phases in feeder_structure.items():
-            phase_loads = self._calculate_phase_loads(phases, customer_data)
-            imbalance = self._calculate_imbalance(phase_loads)
-            total_imbalance += imbalance
-            total_load += sum(pl.total_load_kw for pl in phase_loads)
-            
-            for pl in phase_loads:
-                voltages.append(pl.avg_voltage)
+    def _calculate_overall_stats(self, feeder_totals: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        """
+        Calculate overall statistics for all feeders
+        
+        Args:
+            feeder_totals: Per-feeder totals from _accumulate_feeder_totals
+        """
+        total_feeders = len(feeder_totals)
+        
+        if total_feeders == 0:
+            return {
+                'avg_imbalance': 0,
+                'total_load_kw': 0,
+                'avg_voltage': self.nominal_voltage
+            }
+        
+        totals = np.stack(list(feeder_totals.values()))
+        kw, voltage_sums, voltage_counts = totals[:, 0], totals[:, 2], totals[:, 3]
+        
+        imbalances = _feeder_imbalances(kw)
+        phase_voltages = np.where(
+            voltage_counts > 0,
+            voltage_sums / np.maximum(voltage_counts, 1),
+            self.nominal_voltage
+        )
         
         return {
-            'avg_imbalance': total_imbalance / total_feeders if total_feeders > 0 else 0,
-            'total_load_kw': total_load,
-            'avg_voltage': np.mean(voltages) if voltages else self.nominal_voltage
+            'avg_imbalance': sum(imbalances) / total_feeders,
+            'total_load_kw': kw.sum(),
+            'avg_voltage': phase_voltages.mean()
         }
     
     def _estimate_loss_reduction(self, before_stats: Dict, after_stats: Dict) -> float:
@@ -497,17 +774,19 @@ class LoadBalancer:
         return 0
     
     def _estimate_balanced_feeders(self, suggestions: List[Dict],
-                                  feeder_structure: Dict,
-                                  customer_data: Dict[str, pd.DataFrame]) -> int:
-        """Estimate how many feeders would be balanced after applying suggestions"""
+                                  feeder_imbalances: Dict[str, float]) -> int:
+        """
+        Estimate how many feeders would be balanced after applying suggestions
+        
+        Args:
+            suggestions: Suggested moves
+            feeder_imbalances: Current imbalance of every feeder
+        """
         # Simplified estimation
         feeders_to_improve = set(s['feeder_id'] for s in suggestions)
         
         balanced_count = 0
-        for feeder_id, phases in feeder_structure.items():
-            phase_loads = self._calculate_phase_loads(phases, customer_data)
-            imbalance = self._calculate_imbalance(phase_loads)
-            
+        for feeder_id, imbalance in feeder_imbalances.items():
             if imbalance <= self.max_imbalance_threshold:
                 balanced_count += 1
             elif feeder_id in feeders_to_improve:
@@ -516,6 +795,62 @@ class LoadBalancer:
         
         return int(balanced_count)
     
+    def _classify_transformer_columns(self, columns) -> Dict[str, str]:
+        """
+        Map each TRANSFORMER_COLUMN_PATTERNS key to its first matching column
+        
+        Column names are upper-cased once and classified in a single pass.
+        """
+        resolved = {}
+        
+        for col in columns:
+            col_upper = str(col).upper()
+            for key, substrings in TRANSFORMER_COLUMN_PATTERNS.items():
+                if key not in resolved and all(sub in col_upper for sub in substrings):
+                    resolved[key] = col
+        
+        return resolved
+    
+    def _column_statistics(self, data: pd.DataFrame, columns: List[str]) -> np.ndarray:
+        """
+        Mean, max, min and sample std of several numeric columns at once
+        
+        The columns are coerced to numbers and stacked into one matrix so all
+        four reductions run column-wise over it; NaNs are skipped as pandas
+        would.
+        
+        Returns:
+            Array of shape (4, len(columns)) with rows mean, max, min, std
+        """
+        matrix = np.column_stack([
+            pd.to_numeric(data[col], errors='coerce').to_numpy(dtype=float)
+            for col in columns
+        ]) if columns else np.empty((len(data), 0))
+        
+        if matrix.shape[0] == 0:
+            return np.full((4, matrix.shape[1]), np.nan)
+        
+        # All-NaN columns (and single values for std) yield NaN silently
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.vstack([
+                np.nanmean(matrix, axis=0),
+                np.nanmax(matrix, axis=0),
+                np.nanmin(matrix, axis=0),
+                np.nanstd(matrix, axis=0, ddof=1)
+            ])
+    
+    def _format_statistics(self, stats: np.ndarray, name: str) -> Dict[str, float]:
+        """
+        Key one column of _column_statistics as avg/max/min/std values
+        
+        Keys are suffixed with ``name`` (e.g. ``avg_current``).
+        """
+        return {
+            f'{prefix}_{name}': float(value)
+            for prefix, value in zip(('avg', 'max', 'min', 'std'), stats)
+        }
+    
     def _analyze_transformer_load(self, transformer_data: pd.DataFrame) -> Dict[str, Any]:
         """
         Analyze transformer load data
@@ -536,45 +871,27 @@ class LoadBalancer:
         }
         
         try:
-            # Extract phase currents
-            phase_a_col = [col for col in transformer_data.columns if 'PHASE_A' in col.upper() and 'CURRENT' in col.upper()]
-            phase_b_col = [col for col in transformer_data.columns if 'PHASE_B' in col.upper() and 'CURRENT' in col.upper()]
-            phase_c_col = [col for col in transformer_data.columns if 'PHASE_C' in col.upper() and 'CURRENT' in col.upper()]
+            # Resolve phase current/voltage, load and power factor columns
+            columns = self._classify_transformer_columns(transformer_data.columns)
+            current_keys = ('current_a', 'current_b', 'current_c')
+            voltage_keys = ('voltage_a', 'voltage_b', 'voltage_c')
             
-            # Extract voltages
-            voltage_a_col = [col for col in transformer_data.columns if 'PHASE_A' in col.upper() and 'VOLTAGE' in col.upper()]
-            voltage_b_col = [col for col in transformer_data.columns if 'PHASE_B' in col.upper() and 'VOLTAGE' in col.upper()]
-            voltage_c_col = [col for col in transformer_data.columns if 'PHASE_C' in col.upper() and 'VOLTAGE' in col.upper()]
+            # Statistics of every resolved column, computed in one pass
+            stats = dict(zip(
+                columns,
+                self._column_statistics(transformer_data, list(columns.values())).T
+            ))
             
             # Analyze phase currents
-            if phase_a_col and phase_b_col and phase_c_col:
-                phase_a_current = pd.to_numeric(transformer_data[phase_a_col[0]], errors='coerce')
-                phase_b_current = pd.to_numeric(transformer_data[phase_b_col[0]], errors='coerce')
-                phase_c_current = pd.to_numeric(transformer_data[phase_c_col[0]], errors='coerce')
-                
-                analysis['phase_analysis'] = {
-                    'Phase A': {
-                        'avg_current': float(phase_a_current.mean()),
-                        'max_current': float(phase_a_current.max()),
-                        'min_current': float(phase_a_current.min()),
-                        'std_current': float(phase_a_current.std())
-                    },
-                    'Phase B': {
-                        'avg_current': float(phase_b_current.mean()),
-                        'max_current': float(phase_b_current.max()),
-                        'min_current': float(phase_b_current.min()),
-                        'std_current': float(phase_b_current.std())
-                    },
-                    'Phase C': {
-                        'avg_current': float(phase_c_current.mean()),
-                        'max_current': float(phase_c_current.max()),
-                        'min_current': float(phase_c_current.min()),
-                        'std_current': float(phase_c_current.std())
-                    }
+            if all(key in stats for key in current_keys):
+                current_stats = {
+                    phase: self._format_statistics(stats[key], 'current')
+                    for phase, key in zip(PHASE_NAMES, current_keys)
                 }
+                analysis['phase_analysis'] = dict(current_stats)
                 
                 # Calculate current imbalance
-                avg_currents = [phase_a_current.mean(), phase_b_current.mean(), phase_c_current.mean()]
+                avg_currents = [stats['avg_current'] for stats in current_stats.values()]
                 avg_current = np.mean(avg_currents)
                 if avg_current > 0:
                     max_deviation = max(abs(i - avg_current) for i in avg_currents)
@@ -582,34 +899,15 @@ class LoadBalancer:
                     analysis['phase_analysis']['current_imbalance_percentage'] = float(current_imbalance)
             
             # Analyze voltages
-            if voltage_a_col and voltage_b_col and voltage_c_col:
-                voltage_a = pd.to_numeric(transformer_data[voltage_a_col[0]], errors='coerce')
-                voltage_b = pd.to_numeric(transformer_data[voltage_b_col[0]], errors='coerce')
-                voltage_c = pd.to_numeric(transformer_data[voltage_c_col[0]], errors='coerce')
-                
-                analysis['voltage_statistics'] = {
-                    'Phase A': {
-                        'avg_voltage': float(voltage_a.mean()),
-                        'max_voltage': float(voltage_a.max()),
-                        'min_voltage': float(voltage_a.min()),
-                        'std_voltage': float(voltage_a.std())
-                    },
-                    'Phase B': {
-                        'avg_voltage': float(voltage_b.mean()),
-                        'max_voltage': float(voltage_b.max()),
-                        'min_voltage': float(voltage_b.min()),
-                        'std_voltage': float(voltage_b.std())
-                    },
-                    'Phase C': {
-                        'avg_voltage': float(voltage_c.mean()),
-                        'max_voltage': float(voltage_c.max()),
-                        'min_voltage': float(voltage_c.min()),
-                        'std_voltage': float(voltage_c.std())
-                    }
+            if all(key in stats for key in voltage_keys):
+                voltage_stats = {
+                    phase: self._format_statistics(stats[key], 'voltage')
+                    for phase, key in zip(PHASE_NAMES, voltage_keys)
                 }
+                analysis['voltage_statistics'] = dict(voltage_stats)
                 
                 # Calculate voltage imbalance
-                avg_voltages = [voltage_a.mean(), voltage_b.mean(), voltage_c.mean()]
+                avg_voltages = [stats['avg_voltage'] for stats in voltage_stats.values()]
                 avg_voltage = np.mean(avg_voltages)
                 if avg_voltage > 0:
                     max_deviation = max(abs(v - avg_voltage) for v in avg_voltages)
@@ -617,47 +915,31 @@ class LoadBalancer:
                     analysis['voltage_statistics']['voltage_imbalance_percentage'] = float(voltage_imbalance)
             
             # Analyze load (kW and kVA)
-            load_kw_col = [col for col in transformer_data.columns if 'IMPORT_KW' in col.upper() and 'AVG' in col.upper()]
-            load_kva_col = [col for col in transformer_data.columns if 'IMPORT_KVA' in col.upper() and 'AVG' in col.upper()]
+            if 'load_kw' in stats:
+                analysis['load_statistics']['kw'] = self._format_statistics(
+                    stats['load_kw'], 'load_kw'
+                )
             
-            if load_kw_col:
-                load_kw = pd.to_numeric(transformer_data[load_kw_col[0]], errors='coerce')
-                analysis['load_statistics']['kw'] = {
-                    'avg_load_kw': float(load_kw.mean()),
-                    'max_load_kw': float(load_kw.max()),
-                    'min_load_kw': float(load_kw.min()),
-                    'std_load_kw': float(load_kw.std())
-                }
-            
-            if load_kva_col:
-                load_kva = pd.to_numeric(transformer_data[load_kva_col[0]], errors='coerce')
-                analysis['load_statistics']['kva'] = {
-                    'avg_load_kva': float(load_kva.mean()),
-                    'max_load_kva': float(load_kva.max()),
-                    'min_load_kva': float(load_kva.min()),
-                    'std_load_kva': float(load_kva.std())
-                }
+            if 'load_kva' in stats:
+                kva_stats = self._format_statistics(stats['load_kva'], 'load_kva')
+                analysis['load_statistics']['kva'] = kva_stats
             
             # Analyze power factor
-            pf_col = [col for col in transformer_data.columns if 'POWER_FACTOR' in col.upper()]
-            if pf_col:
-                power_factor = pd.to_numeric(transformer_data[pf_col[0]], errors='coerce')
-                analysis['power_factor_analysis'] = {
-                    'avg_power_factor': float(power_factor.mean()),
-                    'max_power_factor': float(power_factor.max()),
-                    'min_power_factor': float(power_factor.min()),
-                    'std_power_factor': float(power_factor.std())
-                }
+            if 'power_factor' in stats:
+                analysis['power_factor_analysis'] = self._format_statistics(
+                    stats['power_factor'], 'power_factor'
+                )
             
             # Calculate transformer utilization (assuming 100 kVA transformer as default)
             transformer_capacity_kva = 100.0
-            if load_kva_col:
-                utilization_percentage = (load_kva.max() / transformer_capacity_kva) * 100
+            if 'load_kva' in stats:
+                peak_load_kva = kva_stats['max_load_kva']
+                utilization_percentage = (peak_load_kva / transformer_capacity_kva) * 100
                 analysis['utilization'] = {
                     'transformer_capacity_kva': transformer_capacity_kva,
-                    'peak_load_kva': float(load_kva.max()),
+                    'peak_load_kva': peak_load_kva,
                     'utilization_percentage': float(utilization_percentage),
-                    'available_capacity_kva': float(transformer_capacity_kva - load_kva.max())
+                    'available_capacity_kva': float(transformer_capacity_kva - peak_load_kva)
                 }
             
         except Exception as e:
@@ -5,66 +5,152 @@ Implements ARIMA, Prophet, and LSTM models for load prediction
 
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime, timedelta
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import copy
+import hashlib
+import logging
+import os
+import re
+import threading
 import warnings
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
+
+# Format of the timestamps returned with forecasts
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Number of fitted models kept for reuse across forecast calls
+FIT_CACHE_SIZE = 16
+
+# Number of series (session and feeder) whose ARIMA model is kept for warm starts
+ARIMA_WARM_START_SIZE = 64
+
+# Seasonal cycles modelled by MSTL and their length in days
+MSTL_SEASONS = {'daily': 1, 'weekly': 7}
+
+# STL smoother step; smoothing every few points and interpolating between
+# them gives nearly the same decomposition at a fraction of the cost
+MSTL_STL_JUMP = 5
+
+# Substrings identifying a load column, highest priority first
+LOAD_COLUMN_PRIORITY = {'KW': 0, 'POWER': 1, 'LOAD': 2, 'DEMAND': 3, 'KVA': 4}
+
+# Lookahead so overlapping names (e.g. 'LOAD_KW') report every substring
+LOAD_COLUMN_PATTERN = re.compile(f"(?=({'|'.join(LOAD_COLUMN_PRIORITY)}))", re.IGNORECASE)
+
+# Most recent points used by the ADF stationarity test when choosing d
+ADF_MAX_POINTS = 5000
+
+# LSTM training: epoch cap, epochs without val_loss improvement before
+# stopping early, and minibatch size
+LSTM_MAX_EPOCHS = 50
+LSTM_PATIENCE = 3
+LSTM_BATCH_SIZE = 256
+
+# Models compared by compare_models and the LoadForecaster method running each
+COMPARED_MODELS = {
+    'arima': 'forecast_with_arima',
+    'prophet': 'forecast_with_prophet',
+    'lstm': 'forecast_with_lstm'
+}
+
+
+class _MinMax:
+    """Scale values to [0, 1] by the min and max seen in fit_transform"""
+    
+    def __init__(self):
+        self.lo = 0.0
+        self.hi = 1.0
+    
+    def fit_transform(self, values: np.ndarray) -> np.ndarray:
+        """Record the range of ``values`` and return them scaled to [0, 1]"""
+        self.lo, self.hi = values.min(), values.max()
+        return (values - self.lo) / self._span()
+    
+    def inverse_transform(self, scaled: np.ndarray) -> np.ndarray:
+        """Map scaled values back to the original units"""
+        return scaled * self._span() + self.lo
+    
+    def _span(self):
+        # A constant series scales to zeros instead of dividing by zero
+        return (self.hi - self.lo) or 1.0
+
 
 class LoadForecaster:
     """Handles load forecasting using multiple ML/AI models"""
     
-    def __init__(self):
+    def __init__(self, refit_every_n_calls: int = 10, prophet_uncertainty_samples: int = 100):
         self.models = {}
         self.forecasts = {}
+        # Posterior draws behind Prophet's interval bounds; prediction time
+        # grows with this, and 0 skips the bounds altogether
+        self.prophet_uncertainty_samples = prophet_uncertainty_samples
+        # ARIMA models per session and feeder, reapplied to new data without
+        # re-estimation and fully refitted every refit_every_n_calls forecasts
+        self.refit_every_n_calls = refit_every_n_calls
+        self._arima_warm_starts = OrderedDict()
+        self._arima_warm_start_lock = threading.Lock()
+        # Fitted models keyed by model type and a hash of the training data,
+        # so repeated forecasts (e.g. a longer horizon) skip the refit
+        self._fit_cache = OrderedDict()
+        self._fit_cache_lock = threading.Lock()
     
     def _to_json_safe(self, obj):
-        """Convert numpy/pandas types to JSON-serializable Python types"""
+        """
+        Convert numpy/pandas types to JSON-serializable Python types
+        
+        NaN and infinite values become 0.0. Float arrays, and lists made up
+        only of floats (e.g. from Series.tolist()), are cleaned with a single
+        vectorized nan_to_num pass instead of element by element.
+        """
         if obj is None or isinstance(obj, (str, int, bool)):
             return obj
-        elif isinstance(obj, float):
-            # Handle NaN and Infinity
-            if np.isnan(obj) or np.isinf(obj):
-                return 0.0
-            return obj
-        elif isinstance(obj, (np.integer, np.floating)):
-            val = obj.item()
+        elif isinstance(obj, (float, np.floating)):
             # Handle NaN and Infinity
-            if isinstance(val, float) and (np.isnan(val) or np.isinf(val)):
-                return 0.0
-            return val
+            return float(obj) if np.isfinite(obj) else 0.0
+        elif isinstance(obj, np.integer):
+            return obj.item()
         elif isinstance(obj, np.bool_):
             return bool(obj)
         elif isinstance(obj, np.ndarray):
             # Handle NaN and Inf in arrays
-            arr = obj.copy()
-            if arr.dtype.kind == 'f':  # floating point
-                arr = np.where(np.isnan(arr) | np.isinf(arr), 0.0, arr)
-            return arr.tolist()
+            if obj.dtype.kind == 'f':  # floating point
+                obj = np.nan_to_num(obj, nan=0.0, posinf=0.0, neginf=0.0)
+            return obj.tolist()
         elif isinstance(obj, pd.Timestamp):
             return obj.isoformat()
         elif isinstance(obj, dict):
             return {k: self._to_json_safe(v) for k, v in obj.items()}
         elif isinstance(obj, (list, tuple)):
+            if obj and all(type(item) is float for item in obj):
+                return self._to_json_safe(np.array(obj))
             return [self._to_json_safe(item) for item in obj]
         else:
             return obj
     
     def forecast_with_arima(self, load_data: pd.DataFrame, 
-                           forecast_periods: int = 168) -> Dict[str, Any]:
+                           forecast_periods: int = 168,
+                           warm_start_key: Optional[Tuple[str, str]] = None) -> Dict[str, Any]:
         """
         Forecast using ARIMA (AutoRegressive Integrated Moving Average)
         
         Args:
             load_data: DataFrame with 'datetime' and 'load_kw' columns
             forecast_periods: Number of periods to forecast (default: 168 = 1 week hourly)
+            warm_start_key: Optional series identity (session and feeder ID);
+                later forecasts with the same key reuse the estimated parameters
             
         Returns:
             Dictionary with forecast results
         """
         try:
             from statsmodels.tsa.arima.model import ARIMA
-            from statsmodels.tsa.stattools import adfuller
         except ImportError:
             return {
                 'success': False,
@@ -82,57 +168,44 @@ class LoadForecaster:
                 return {'success': False, 'error': 'No load column found'}
             
             # Ensure sorted by time
-            df = load_data.sort_values('datetime').copy()
-            df['load_kw'] = pd.to_numeric(df[load_col], errors='coerce')
+            df = load_data.sort_values('datetime', kind='stable', ignore_index=True)
+            df['load_kw'] = self._to_load_values(df[load_col])
             df = df.dropna(subset=['load_kw'])
             
             if len(df) < 50:
                 return {'success': False, 'error': 'Insufficient data points (need at least 50)'}
             
-            # Check stationarity
-            adf_result = adfuller(df['load_kw'].values)
-            is_stationary = adf_result[1] < 0.05
-            
-            # Auto-select ARIMA parameters (simplified)
-            p, d, q = self._auto_select_arima_params(df['load_kw'], is_stationary)
-            
-            # Fit ARIMA model
-            model = ARIMA(df['load_kw'].values, order=(p, d, q))
-            fitted_model = model.fit()
+            # Fit ARIMA model (reused if this series was fitted before)
+            values = df['load_kw'].to_numpy(dtype=float)
+            fitted_model, (p, d, q) = self._cached_fit(
+                'arima', (values,), lambda: self._fit_arima(values, warm_start_key)
+            )
             
             # Generate forecast
             forecast = fitted_model.forecast(steps=forecast_periods)
             
             # Calculate confidence intervals (95%)
-            forecast_std = np.std(df['load_kw'])
+            forecast_std = np.std(values)
             lower_bound = forecast - 1.96 * forecast_std
             upper_bound = forecast + 1.96 * forecast_std
             
             # Generate future timestamps
             last_time = df['datetime'].max()
             time_delta = self._estimate_time_delta(df)
-            future_times = [last_time + (i + 1) * time_delta for i in range(forecast_periods)]
+            future_times = self._future_times(last_time, time_delta, forecast_periods)
             
             # Calculate model performance metrics
             fitted_values = fitted_model.fittedvalues
             actual_values = df['load_kw'].values[-len(fitted_values):]
             
-            mae = np.mean(np.abs(fitted_values - actual_values))
-            rmse = np.sqrt(np.mean((fitted_values - actual_values) ** 2))
-            
-            # Calculate MAPE safely, avoiding division by zero
-            non_zero_mask = actual_values != 0
-            if np.sum(non_zero_mask) > 0:
-                mape = np.mean(np.abs((actual_values[non_zero_mask] - fitted_values[non_zero_mask]) / actual_values[non_zero_mask])) * 100
-            else:
-                mape = 0.0
+            mae, rmse, mape = self._error_metrics(actual_values, fitted_values)
             
             result = {
                 'success': True,
                 'model_type': 'ARIMA',
                 'model_params': {'p': p, 'd': d, 'q': q},
                 'forecast': {
-                    'timestamps': [str(t) for t in future_times],
+                    'timestamps': self._format_timestamps(future_times),
                     'values': forecast.tolist(),
                     'lower_bound': lower_bound.tolist(),
                     'upper_bound': upper_bound.tolist()
@@ -143,7 +216,7 @@ class LoadForecaster:
                     'mape': float(mape)
                 },
                 'historical': {
-                    'timestamps': [str(t) for t in df['datetime'].tolist()],
+                    'timestamps': self._format_timestamps(df['datetime']),
                     'values': df['load_kw'].tolist(),
                     'fitted_values': fitted_values.tolist()
                 }
@@ -158,13 +231,16 @@ class LoadForecaster:
             }
     
     def forecast_with_prophet(self, load_data: pd.DataFrame,
-                             forecast_periods: int = 168) -> Dict[str, Any]:
+                             forecast_periods: int = 168,
+                             uncertainty_samples: Optional[int] = None) -> Dict[str, Any]:
         """
         Forecast using Facebook Prophet
         
         Args:
             load_data: DataFrame with 'datetime' and load column
             forecast_periods: Number of periods to forecast
+            uncertainty_samples: Draws for the interval bounds (defaults to
+                self.prophet_uncertainty_samples; 0 returns the forecast as both bounds)
             
         Returns:
             Dictionary with forecast results
@@ -183,28 +259,25 @@ class LoadForecaster:
             if not load_col:
                 return {'success': False, 'error': 'No load column found'}
             
-            df = load_data.sort_values('datetime').copy()
+            df = load_data.sort_values('datetime', kind='stable', ignore_index=True)
             
             # Prophet requires 'ds' and 'y' columns
             prophet_df = pd.DataFrame({
                 'ds': pd.to_datetime(df['datetime']),
-                'y': pd.to_numeric(df[load_col], errors='coerce')
+                'y': self._to_load_values(df[load_col])
             })
             prophet_df = prophet_df.dropna()
             
             if len(prophet_df) < 50:
                 return {'success': False, 'error': 'Insufficient data points'}
             
-            # Initialize and fit Prophet model
-            model = Prophet(
-                daily_seasonality=True,
-                weekly_seasonality=True,
-                yearly_seasonality=False,  # Usually not enough data
-                changepoint_prior_scale=0.05
+            # Fit Prophet model (reused if this series was fitted before)
+            model = self._cached_fit(
+                'prophet',
+                (prophet_df['ds'].to_numpy(), prophet_df['y'].to_numpy()),
+                lambda: self._fit_prophet(prophet_df)
             )
             
-            model.fit(prophet_df)
-            
             # Create future dataframe
             time_delta = self._estimate_time_delta(df)
             future = model.make_future_dataframe(
@@ -212,8 +285,16 @@ class LoadForecaster:
                 freq=self._timedelta_to_freq(time_delta)
             )
             
-            # Generate forecast
+            # Generate forecast; the sample count is set on a shallow copy, as
+            # the cached model may be predicting for another request
+            if uncertainty_samples is None:
+                uncertainty_samples = self.prophet_uncertainty_samples
+            if uncertainty_samples != model.uncertainty_samples:
+                model = copy.copy(model)
+                model.uncertainty_samples = uncertainty_samples
             forecast = model.predict(future)
+            if not uncertainty_samples:
+                forecast['yhat_lower'] = forecast['yhat_upper'] = forecast['yhat']
             
             # Extract forecast data
             forecast_data = forecast[forecast['ds'] > prophet_df['ds'].max()]
@@ -223,21 +304,13 @@ class LoadForecaster:
             actual = prophet_df['y'].values
             predicted = train_pred['yhat'].values[:len(actual)]
             
-            mae = np.mean(np.abs(actual - predicted))
-            rmse = np.sqrt(np.mean((actual - predicted) ** 2))
-            
-            # Calculate MAPE safely, avoiding division by zero
-            non_zero_mask = actual != 0
-            if np.sum(non_zero_mask) > 0:
-                mape = np.mean(np.abs((actual[non_zero_mask] - predicted[non_zero_mask]) / actual[non_zero_mask])) * 100
-            else:
-                mape = 0.0
+            mae, rmse, mape = self._error_metrics(actual, predicted)
             
             result = {
                 'success': True,
                 'model_type': 'Prophet',
                 'forecast': {
-                    'timestamps': [str(t) for t in forecast_data['ds'].tolist()],
+                    'timestamps': self._format_timestamps(forecast_data['ds']),
                     'values': forecast_data['yhat'].tolist(),
                     'lower_bound': forecast_data['yhat_lower'].tolist(),
                     'upper_bound': forecast_data['yhat_upper'].tolist()
@@ -248,7 +321,7 @@ class LoadForecaster:
                     'mape': float(mape)
                 },
                 'historical': {
-                    'timestamps': [str(t) for t in prophet_df['ds'].tolist()],
+                    'timestamps': self._format_timestamps(prophet_df['ds']),
                     'values': prophet_df['y'].tolist(),
                     'fitted_values': predicted.tolist()
                 },
@@ -267,6 +340,114 @@ class LoadForecaster:
                 'error': f'Prophet forecasting failed: {str(e)}'
             }
     
+    def forecast_with_mstl(self, load_data: pd.DataFrame,
+                           forecast_periods: int = 168) -> Dict[str, Any]:
+        """
+        Forecast using MSTL (Multiple Seasonal-Trend decomposition using LOESS)
+        
+        The series is split into daily and weekly seasonal components and a
+        deseasonalized remainder. Seasonal components are extended by
+        repeating their last cycle and the remainder is forecast with damped
+        Holt exponential smoothing. Covers the same daily + weekly structure
+        as the Prophet model at a fraction of its cost (model_type 'mstl').
+        
+        Args:
+            load_data: DataFrame with 'datetime' and load column
+            forecast_periods: Number of periods to forecast
+            
+        Returns:
+            Dictionary with forecast results (same layout as Prophet's)
+        """
+        try:
+            from statsmodels.tsa.seasonal import MSTL
+        except ImportError:
+            return {
+                'success': False,
+                'error': 'statsmodels not installed. Install with: pip install statsmodels'
+            }
+        
+        try:
+            # Prepare data
+            load_col = self._find_load_column(load_data)
+            if not load_col:
+                return {'success': False, 'error': 'No load column found'}
+            
+            df = load_data.sort_values('datetime', kind='stable', ignore_index=True)
+            df['load_kw'] = self._to_load_values(df[load_col])
+            df = df.dropna(subset=['load_kw'])
+            
+            if len(df) < 50:
+                return {'success': False, 'error': 'Insufficient data points (need at least 50)'}
+            
+            time_delta = self._estimate_time_delta(df)
+            seasons = self._seasonal_periods(time_delta, len(df))
+            if not seasons:
+                return {'success': False, 'error': 'Not enough data to model seasonality'}
+            periods = tuple(seasons.values())
+            
+            # Decompose and fit the remainder (reused if this series was fitted before)
+            values = df['load_kw'].to_numpy(dtype=float)
+            seasonal, trend_model = self._cached_fit(
+                f'mstl-{periods}', (values,), lambda: self._fit_mstl(values, periods)
+            )
+            
+            # Repeat the last cycle of each seasonal component
+            n = len(values)
+            steps = np.arange(forecast_periods)
+            seasonal_forecast = np.column_stack([
+                seasonal[n - period + steps % period, i] for i, period in enumerate(periods)
+            ])
+            seasonal_by_name = dict(zip(seasons, seasonal_forecast.T))
+            trend_forecast = np.asarray(trend_model.forecast(forecast_periods))
+            forecast = trend_forecast + seasonal_forecast.sum(axis=1)
+            
+            fitted_values = np.asarray(trend_model.fittedvalues) + seasonal.sum(axis=1)
+            
+            # Calculate confidence intervals (95%) from the in-sample error
+            forecast_std = np.std(values - fitted_values)
+            lower_bound = forecast - 1.96 * forecast_std
+            upper_bound = forecast + 1.96 * forecast_std
+            
+            # Calculate model performance metrics
+            mae, rmse, mape = self._error_metrics(values, fitted_values)
+            
+            future_times = self._future_times(df['datetime'].max(), time_delta, forecast_periods)
+            
+            result = {
+                'success': True,
+                'model_type': 'MSTL',
+                'model_params': {'seasonal_periods': seasons},
+                'forecast': {
+                    'timestamps': self._format_timestamps(future_times),
+                    'values': forecast.tolist(),
+                    'lower_bound': lower_bound.tolist(),
+                    'upper_bound': upper_bound.tolist()
+                },
+                'metrics': {
+                    'mae': float(mae),
+                    'rmse': float(rmse),
+                    'mape': float(mape)
+                },
+                'historical': {
+                    'timestamps': self._format_timestamps(df['datetime']),
+                    'values': df['load_kw'].tolist(),
+                    'fitted_values': fitted_values.tolist()
+                },
+                'components': {
+                    'trend': trend_forecast.tolist(),
+                    'weekly': seasonal_by_name['weekly'].tolist() if 'weekly' in seasonal_by_name else None,
+                    'daily': seasonal_by_name['daily'].tolist() if 'daily' in seasonal_by_name else None
+                }
+            }
+            
+            return self._to_json_safe(result)
+            
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'MSTL forecasting failed: {str(e)}'
+            }
+    
     def forecast_with_lstm(self, load_data: pd.DataFrame,
                           forecast_periods: int = 168,
                           lookback_periods: int = 24) -> Dict[str, Any]:
@@ -288,7 +469,7 @@ class LoadForecaster:
         except ImportError:
             return {
                 'success': False,
-                'error': 'TensorFlow not installed. Install with: pip install tensorflow scikit-learn'
+                'error': 'TensorFlow not installed. Install with: pip install tensorflow'
             }
         
         try:
@@ -297,16 +478,16 @@ class LoadForecaster:
             if not load_col:
                 return {'success': False, 'error': 'No load column found'}
             
-            df = load_data.sort_values('datetime').copy()
-            df['load_kw'] = pd.to_numeric(df[load_col], errors='coerce')
+            df = load_data.sort_values('datetime', kind='stable', ignore_index=True)
+            df['load_kw'] = self._to_load_values(df[load_col])
             df = df.dropna(subset=['load_kw'])
             
             if len(df) < lookback_periods * 3:
                 return {'success': False, 'error': f'Insufficient data points (need at least {lookback_periods * 3})'}
             
             # Scale data
-            scaler = MinMaxScaler(feature_range=(0, 1))
-            scaled_data = scaler.fit_transform(df['load_kw'].values.reshape(-1, 1))
+            scaler = _MinMax()
+            scaled_data = scaler.fit_transform(df['load_kw'].to_numpy().reshape(-1, 1))
             
             # Prepare sequences
             X, y = self._create_sequences(scaled_data, lookback_periods)
@@ -316,45 +497,23 @@ class LoadForecaster:
             X_train, X_test = X[:train_size], X[train_size:]
             y_train, y_test = y[:train_size], y[train_size:]
             
-            # Build LSTM model
-            model = keras.Sequential([
-                keras.layers.LSTM(50, return_sequences=True, input_shape=(lookback_periods, 1)),
-                keras.layers.Dropout(0.2),
-                keras.layers.LSTM(50, return_sequences=False),
-                keras.layers.Dropout(0.2),
-                keras.layers.Dense(25),
-                keras.layers.Dense(1)
-            ])
-            
-            model.compile(optimizer='adam', loss='mean_squared_error')
-            
-            # Train model (with reduced epochs for speed)
-            history = model.fit(
-                X_train, y_train,
-                batch_size=32,
-                epochs=20,
-                validation_data=(X_test, y_test),
-                verbose=0
+            # Build and train LSTM model (reused if this series was fitted before)
+            model, history = self._cached_fit(
+                f'lstm-{lookback_periods}',
+                (scaled_data,),
+                lambda: self._fit_lstm(X_train, y_train, X_test, y_test, lookback_periods)
             )
             
             # Generate forecast
-            last_sequence = scaled_data[-lookback_periods:]
-            forecast_values = []
-            
-            current_sequence = last_sequence.copy()
-            for _ in range(forecast_periods):
-                # Predict next value
-                next_pred = model.predict(current_sequence.reshape(1, lookback_periods, 1), verbose=0)
-                forecast_values.append(next_pred[0, 0])
-                
-                # Update sequence
-                current_sequence = np.append(current_sequence[1:], next_pred)
+            forecast_values = self._rollout_lstm(
+                model, scaled_data[-lookback_periods:, 0], forecast_periods
+            )
             
             # Inverse transform predictions
-            forecast_values = scaler.inverse_transform(np.array(forecast_values).reshape(-1, 1)).flatten()
+            forecast_values = scaler.inverse_transform(forecast_values)
             
             # Calculate confidence intervals (using training error)
-            test_pred = model.predict(X_test, verbose=0)
+            test_pred = model.predict(X_test, verbose=0).ravel()
             test_error_std = np.std(scaler.inverse_transform(y_test) - scaler.inverse_transform(test_pred))
             
             lower_bound = forecast_values - 1.96 * test_error_std
@@ -363,33 +522,27 @@ class LoadForecaster:
             # Generate future timestamps
             last_time = df['datetime'].max()
             time_delta = self._estimate_time_delta(df)
-            future_times = [last_time + (i + 1) * time_delta for i in range(forecast_periods)]
+            future_times = self._future_times(last_time, time_delta, forecast_periods)
             
             # Calculate metrics
-            train_pred = model.predict(X_train, verbose=0)
+            train_pred = model.predict(X_train, verbose=0).ravel()
             train_actual = scaler.inverse_transform(y_train)
             train_pred_inv = scaler.inverse_transform(train_pred)
             
-            mae = np.mean(np.abs(train_actual - train_pred_inv))
-            rmse = np.sqrt(np.mean((train_actual - train_pred_inv) ** 2))
-            
-            # Calculate MAPE safely, avoiding division by zero
-            non_zero_mask = train_actual.flatten() != 0
-            if np.sum(non_zero_mask) > 0:
-                mape = np.mean(np.abs((train_actual.flatten()[non_zero_mask] - train_pred_inv.flatten()[non_zero_mask]) / train_actual.flatten()[non_zero_mask])) * 100
-            else:
-                mape = 0.0
+            mae, rmse, mape = self._error_metrics(train_actual, train_pred_inv)
+            # Early stopping may end training before LSTM_MAX_EPOCHS
+            epochs_run = len(history.epoch)
             
             result = {
                 'success': True,
                 'model_type': 'LSTM',
                 'model_params': {
                     'lookback_periods': lookback_periods,
-                    'epochs': 20,
+                    'epochs': epochs_run,
                     'layers': 2
                 },
                 'forecast': {
-                    'timestamps': [str(t) for t in future_times],
+                    'timestamps': self._format_timestamps(future_times),
                     'values': forecast_values.tolist(),
                     'lower_bound': lower_bound.tolist(),
                     'upper_bound': upper_bound.tolist()
@@ -398,10 +551,11 @@ class LoadForecaster:
                     'mae': float(mae),
                     'rmse': float(rmse),
                     'mape': float(mape),
-                    'final_loss': float(history.history['loss'][-1])
+                    'final_loss': float(history.history['loss'][-1]),
+                    'epochs_run': epochs_run
                 },
                 'historical': {
-                    'timestamps': [str(t) for t in df['datetime'].tolist()],
+                    'timestamps': self._format_timestamps(df['datetime']),
                     'values': df['load_kw'].tolist()
                 }
             }
@@ -417,15 +571,18 @@ class LoadForecaster:
     def forecast_aggregate_load(self, customer_data: Dict[str, pd.DataFrame],
                                feeder_id: str,
                                model_type: str = 'prophet',
-                               forecast_periods: int = 168) -> Dict[str, Any]:
+                               forecast_periods: int = 168,
+                               session_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Forecast aggregate load for all customers on a feeder
         
         Args:
             customer_data: Dictionary of customer DataFrames
             feeder_id: Feeder to forecast
-            model_type: 'arima', 'prophet', or 'lstm'
+            model_type: 'arima', 'prophet', 'mstl', or 'lstm'
             forecast_periods: Number of periods to forecast
+            session_id: Session the data belongs to; ARIMA parameters are
+                only reused for the same session and feeder
             
         Returns:
             Aggregate forecast results
@@ -442,9 +599,13 @@ class LoadForecaster:
             
             # Apply selected forecasting model
             if model_type.lower() == 'arima':
-                result = self.forecast_with_arima(aggregated_data, forecast_periods)
+                warm_start_key = (session_id, feeder_id) if session_id is not None else None
+                result = self.forecast_with_arima(aggregated_data, forecast_periods,
+                                                  warm_start_key=warm_start_key)
             elif model_type.lower() == 'prophet':
                 result = self.forecast_with_prophet(aggregated_data, forecast_periods)
+            elif model_type.lower() == 'mstl':
+                result = self.forecast_with_mstl(aggregated_data, forecast_periods)
             elif model_type.lower() == 'lstm':
                 result = self.forecast_with_lstm(aggregated_data, forecast_periods)
             else:
@@ -465,6 +626,30 @@ class LoadForecaster:
                 'error': f'Aggregate forecasting failed: {str(e)}'
             }
     
+    def forecast_many_feeders(self, feeder_customer_data: Dict[str, Dict[str, pd.DataFrame]],
+                              model_type: str = 'prophet',
+                              forecast_periods: int = 168,
+                              session_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Forecast aggregate load of several feeders in parallel
+        
+        Args:
+            feeder_customer_data: Customer DataFrames of each feeder, keyed by feeder ID
+            model_type: 'arima', 'prophet', 'mstl', or 'lstm'
+            forecast_periods: Number of periods to forecast
+            session_id: Session the data belongs to (see forecast_aggregate_load)
+            
+        Returns:
+            forecast_aggregate_load result of each feeder, keyed by feeder ID
+        """
+        jobs = {
+            feeder_id: ('forecast_aggregate_load',
+                        (customer_data, feeder_id, model_type, forecast_periods, session_id))
+            for feeder_id, customer_data in feeder_customer_data.items()
+        }
+        
+        return self._run_parallel(jobs)
+    
     def forecast_transformer_load(self, transformer_data: pd.DataFrame,
                                   model_type: str = 'prophet',
                                   forecast_periods: int = 168) -> Dict[str, Any]:
@@ -473,7 +658,7 @@ class LoadForecaster:
         
         Args:
             transformer_data: DataFrame containing transformer load data
-            model_type: 'arima', 'prophet', or 'lstm'
+            model_type: 'arima', 'prophet', 'mstl', or 'lstm'
             forecast_periods: Number of periods to forecast
             
         Returns:
@@ -494,6 +679,8 @@ class LoadForecaster:
                 result = self.forecast_with_arima(prepared_data, forecast_periods)
             elif model_type.lower() == 'prophet':
                 result = self.forecast_with_prophet(prepared_data, forecast_periods)
+            elif model_type.lower() == 'mstl':
+                result = self.forecast_with_mstl(prepared_data, forecast_periods)
             elif model_type.lower() == 'lstm':
                 result = self.forecast_with_lstm(prepared_data, forecast_periods)
             else:
@@ -526,11 +713,14 @@ class LoadForecaster:
         Returns:
             Comparison of all models
         """
-        results = {
-            'arima': self.forecast_with_arima(load_data, forecast_periods),
-            'prophet': self.forecast_with_prophet(load_data, forecast_periods),
-            'lstm': self.forecast_with_lstm(load_data, forecast_periods)
+        jobs = {
+            model_name: (method, (load_data, forecast_periods))
+            for model_name, method in COMPARED_MODELS.items()
         }
+        # Only the point forecasts are compared, so skip Prophet's interval sampling
+        jobs['prophet'] = (COMPARED_MODELS['prophet'], (load_data, forecast_periods, 0))
+        
+        results = self._run_parallel(jobs)
         
         # Determine best model based on MAPE
         best_model = None
@@ -553,17 +743,274 @@ class LoadForecaster:
     
     # Helper methods
     
+    def _run_parallel(self, jobs: Dict[str, Tuple[str, tuple]]) -> Dict[str, Any]:
+        """
+        Run independent forecasting jobs concurrently
+        
+        Jobs run in threads sharing this instance, so they use (and fill) its
+        fit cache and ARIMA warm starts. The fits spend most of their time in
+        NumPy/SciPy, TensorFlow or Prophet's Stan process, which run outside
+        the GIL.
+        
+        Args:
+            jobs: Maps a result key to (LoadForecaster method name, arguments)
+            
+        Returns:
+            Each job's result under its key, in the order of ``jobs``. Jobs
+            run one after another on single-CPU hosts or if no thread can be
+            started.
+        """
+        n_workers = min(len(jobs), os.cpu_count() or 1)
+        
+        if n_workers >= 2:
+            pool = ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix='forecast')
+            try:
+                futures = {pool.submit(getattr(self, method), *args): key
+                           for key, (method, args) in jobs.items()}
+            except RuntimeError as e:
+                # Raised when a thread cannot be started; errors inside the
+                # jobs surface from result() below instead
+                pool.shutdown(cancel_futures=True)
+                logger.warning("Could not start forecasting threads, running serially: %s", e)
+            else:
+                with pool:
+                    finished = {futures[future]: future.result() for future in as_completed(futures)}
+                return {key: finished[key] for key in jobs}
+        
+        return {key: getattr(self, method)(*args) for key, (method, args) in jobs.items()}
+    
+    def _cached_fit(self, model_key: str, data: Tuple[np.ndarray, ...], fit):
+        """
+        Return the fitted model for ``data``, fitting it only on a cache miss
+        
+        Args:
+            model_key: Model type (and any settings that change the fit)
+            data: Arrays the fit depends on; they are hashed into the cache key
+            fit: Zero-argument callable that fits and returns the model
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for arr in data:
+            arr = np.ascontiguousarray(arr)
+            digest.update(str(arr.dtype).encode())
+            digest.update(arr.tobytes())
+        key = (model_key, digest.hexdigest())
+        
+        with self._fit_cache_lock:
+            if key in self._fit_cache:
+                self._fit_cache.move_to_end(key)
+                return self._fit_cache[key]
+        
+        fitted = fit()
+        
+        with self._fit_cache_lock:
+            self._fit_cache[key] = fitted
+            while len(self._fit_cache) > FIT_CACHE_SIZE:
+                self._fit_cache.popitem(last=False)
+        
+        return fitted
+    
+    def _fit_arima(self, values: np.ndarray, warm_start_key: Optional[Tuple[str, str]] = None):
+        """
+        Select the order of and fit an ARIMA model
+        
+        With a warm_start_key seen before, the model last estimated for that
+        key is applied to the new data (a filtering pass, no estimation)
+        until it has been reused refit_every_n_calls times. Only the
+        ARIMA_WARM_START_SIZE most recently used keys are kept.
+        
+        Returns:
+            Tuple of (fitted model, (p, d, q))
+        """
+        from statsmodels.tsa.arima.model import ARIMA
+        from statsmodels.tsa.stattools import adfuller
+        from arima_css import fit_arima_css
+        
+        warm_start = None
+        if warm_start_key is not None:
+            with self._arima_warm_start_lock:
+                warm_start = self._arima_warm_starts.get(warm_start_key)
+                if warm_start is not None and warm_start['calls'] < self.refit_every_n_calls:
+                    warm_start['calls'] += 1
+                    self._arima_warm_starts.move_to_end(warm_start_key)
+                else:
+                    warm_start = None
+        if warm_start is not None:
+            return warm_start['model'].apply(values), warm_start['order']
+        
+        # Check stationarity on recent data only, with the Schwert rule lag
+        # rather than an AIC search over every lag up to it
+        recent = values[-ADF_MAX_POINTS:]
+        adf_result = adfuller(recent, maxlag=int(12 * (len(recent) / 100) ** 0.25), autolag=None)
+        is_stationary = adf_result[1] < 0.05
+        
+        # Auto-select ARIMA parameters (simplified)
+        p, d, q = self._auto_select_arima_params(pd.Series(values), is_stationary)
+        
+        # Fit by conditional sum of squares, falling back to statsmodels'
+        # exact maximum likelihood fit if that fails
+        try:
+            fitted_model = fit_arima_css(values, order=(p, d, q))
+        except ValueError:
+            model = ARIMA(values, order=(p, d, q))
+            fitted_model = model.fit()
+        
+        if warm_start_key is not None:
+            with self._arima_warm_start_lock:
+                self._arima_warm_starts[warm_start_key] = {
+                    'model': fitted_model,
+                    'order': (p, d, q),
+                    'calls': 0
+                }
+                self._arima_warm_starts.move_to_end(warm_start_key)
+                while len(self._arima_warm_starts) > ARIMA_WARM_START_SIZE:
+                    self._arima_warm_starts.popitem(last=False)
+        
+        return fitted_model, (p, d, q)
+    
+    def _fit_prophet(self, prophet_df: pd.DataFrame):
+        """Fit a Prophet model on a DataFrame with 'ds' and 'y' columns"""
+        from prophet import Prophet
+        
+        model = Prophet(
+            daily_seasonality=True,
+            weekly_seasonality=True,
+            yearly_seasonality=False,  # Usually not enough data
+            changepoint_prior_scale=0.05,
+            mcmc_samples=0,
+            uncertainty_samples=self.prophet_uncertainty_samples,
+            stan_backend='CMDSTANPY'
+        )
+        
+        model.fit(prophet_df)
+        
+        return model
+    
+    def _fit_mstl(self, values: np.ndarray, periods: Tuple[int, ...]):
+        """
+        Decompose a series with MSTL and fit the deseasonalized remainder
+        
+        Returns:
+            Tuple of (seasonal components with one column per period,
+            fitted damped Holt model of the deseasonalized series)
+        """
+        from statsmodels.tsa.seasonal import MSTL
+        from statsmodels.tsa.holtwinters import ExponentialSmoothing
+        
+        jumps = {'seasonal_jump': MSTL_STL_JUMP, 'trend_jump': MSTL_STL_JUMP,
+                 'low_pass_jump': MSTL_STL_JUMP}
+        decomposition = MSTL(values, periods=periods, iterate=1, stl_kwargs=jumps).fit()
+        seasonal = np.asarray(decomposition.seasonal).reshape(len(values), len(periods))
+        
+        trend_model = ExponentialSmoothing(
+            values - seasonal.sum(axis=1), trend='add', damped_trend=True
+        ).fit()
+        
+        return seasonal, trend_model
+    
+    def _fit_lstm(self, X_train: np.ndarray, y_train: np.ndarray,
+                  X_test: np.ndarray, y_test: np.ndarray, lookback_periods: int):
+        """
+        Build and train the forecasting LSTM
+        
+        Returns:
+            Tuple of (trained model, training history)
+        """
+        import tensorflow as tf
+        from tensorflow import keras
+        
+        # On a GPU, compute in float16 (tensor cores, half the memory traffic);
+        # the output layer stays float32 for stability
+        use_gpu = bool(tf.config.list_physical_devices('GPU'))
+        layer_dtype = 'mixed_float16' if use_gpu else None
+        
+        model = keras.Sequential([
+            keras.layers.LSTM(50, return_sequences=True, input_shape=(lookback_periods, 1),
+                              dtype=layer_dtype),
+            keras.layers.Dropout(0.2, dtype=layer_dtype),
+            keras.layers.LSTM(50, return_sequences=False, dtype=layer_dtype),
+            keras.layers.Dropout(0.2, dtype=layer_dtype),
+            keras.layers.Dense(25, dtype=layer_dtype),
+            keras.layers.Dense(1, dtype='float32')
+        ])
+        
+        model.compile(optimizer='adam', loss='mean_squared_error')
+        
+        # Feed batches from an in-memory tf.data pipeline rather than having
+        # fit() slice the NumPy arrays every step
+        train_ds = (tf.data.Dataset.from_tensor_slices((X_train, y_train))
+                    .cache()
+                    .shuffle(1024)
+                    .batch(LSTM_BATCH_SIZE)
+                    .prefetch(tf.data.AUTOTUNE))
+        val_ds = (tf.data.Dataset.from_tensor_slices((X_test, y_test))
+                  .batch(LSTM_BATCH_SIZE)
+                  .cache()
+                  .prefetch(tf.data.AUTOTUNE))
+        
+        # Train until validation loss stops improving, keeping the best weights
+        early_stopping = keras.callbacks.EarlyStopping(
+            monitor='val_loss', patience=LSTM_PATIENCE, restore_best_weights=True
+        )
+        history = model.fit(
+            train_ds,
+            epochs=LSTM_MAX_EPOCHS,
+            validation_data=val_ds,
+            callbacks=[early_stopping],
+            verbose=0
+        )
+        
+        return model, history
+    
+    def _to_load_values(self, column: pd.Series) -> pd.Series:
+        """Parse a load column as float64 (unparseable entries become NaN)"""
+        return pd.to_numeric(column, errors='coerce').astype(float)
+    
     def _find_load_column(self, df: pd.DataFrame) -> Optional[str]:
-        """Find the load/power column in DataFrame"""
-        # Priority order
-        patterns = ['KW', 'POWER', 'LOAD', 'DEMAND', 'KVA']
+        """
+        Find the load/power column in DataFrame
         
-        for pattern in patterns:
-            matching_cols = [col for col in df.columns if pattern in col.upper()]
-            if matching_cols:
-                return matching_cols[0]
+        Returns the first column containing the highest-priority substring
+        in LOAD_COLUMN_PRIORITY, found in a single pass over the columns.
+        """
+        best_col, best_rank = None, len(LOAD_COLUMN_PRIORITY)
         
-        return None
+        for col in df.columns:
+            for match in LOAD_COLUMN_PATTERN.findall(col):
+                rank = LOAD_COLUMN_PRIORITY[match.upper()]
+                if rank < best_rank:
+                    best_col, best_rank = col, rank
+            if best_rank == 0:
+                break
+        
+        return best_col
+    
+    def _error_metrics(self, actual: np.ndarray,
+                       predicted: np.ndarray) -> Tuple[float, float, float]:
+        """
+        MAE, RMSE and MAPE (%) of predictions
+        
+        All three come from one error array: RMSE via a dot product, then MAE
+        and MAPE from the same buffer made absolute and divided in place.
+        MAPE skips zero actual values (0.0 if all are zero).
+        """
+        actual = np.asarray(actual, dtype=float).ravel()
+        error = np.asarray(predicted, dtype=float).ravel() - actual
+        
+        rmse = np.sqrt(error @ error / len(error))
+        
+        np.abs(error, out=error)
+        mae = error.mean()
+        
+        # Calculate MAPE safely, avoiding division by zero
+        non_zero_mask = actual != 0
+        non_zero_count = np.count_nonzero(non_zero_mask)
+        if non_zero_count > 0:
+            np.divide(error, np.abs(actual), out=error, where=non_zero_mask)
+            mape = error.sum(where=non_zero_mask) / non_zero_count * 100
+        else:
+            mape = 0.0
+        
+        return float(mae), float(rmse), float(mape)
     
     def _estimate_time_delta(self, df: pd.DataFrame) -> timedelta:
         """Estimate time interval between readings"""
@@ -575,6 +1022,34 @@ class LoadForecaster:
         
         return median_diff
     
+    def _future_times(self, last_time: pd.Timestamp, time_delta: timedelta,
+                      periods: int) -> pd.DatetimeIndex:
+        """Timestamps of the ``periods`` readings following ``last_time``"""
+        return last_time + pd.to_timedelta(np.arange(1, periods + 1) * time_delta)
+    
+    def _format_timestamps(self, times) -> List[str]:
+        """Format timestamps as TIMESTAMP_FORMAT strings in one vectorized pass"""
+        return pd.DatetimeIndex(times).strftime(TIMESTAMP_FORMAT).fillna('NaT').tolist()
+    
+    def _seasonal_periods(self, time_delta: timedelta, n_points: int) -> Dict[str, int]:
+        """
+        Length in readings of each MSTL_SEASONS cycle, keyed by name
+        
+        Only cycles spanning a whole number of (at least two) readings and
+        covered at least twice by the data are kept.
+        """
+        seconds = time_delta.total_seconds()
+        if seconds <= 0:
+            return {}
+        
+        periods = {}
+        for name, days in MSTL_SEASONS.items():
+            period = days * 86400 / seconds
+            if period == int(period) and 2 <= period and 2 * period <= n_points:
+                periods[name] = int(period)
+        
+        return periods
+    
     def _timedelta_to_freq(self, td: timedelta) -> str:
         """Convert timedelta to pandas frequency string"""
         total_seconds = td.total_seconds()
@@ -600,20 +1075,55 @@ class LoadForecaster:
         
         return p, d, q
     
+    def _rollout_lstm(self, model, last_sequence: np.ndarray, steps: int) -> np.ndarray:
+        """
+        Autoregressively forecast ``steps`` values from the last input window
+        
+        Each prediction is appended to the window to predict the next one. The
+        whole rollout runs as a single tf.function (a graph-mode while loop),
+        avoiding a model.predict round trip per step.
+        """
+        import tensorflow as tf
+        
+        @tf.function
+        def rollout(window):
+            outputs = tf.TensorArray(tf.float32, size=steps)
+            for i in tf.range(steps):
+                next_value = tf.cast(model(window, training=False), tf.float32)
+                outputs = outputs.write(i, next_value[0, 0])
+                window = tf.concat([window[:, 1:, :], tf.reshape(next_value, (1, 1, 1))], axis=1)
+            return outputs.stack()
+        
+        window = tf.constant(last_sequence.reshape(1, -1, 1), dtype=tf.float32)
+        
+        return rollout(window).numpy()
+    
     def _create_sequences(self, data: np.ndarray, 
                          lookback: int) -> Tuple[np.ndarray, np.ndarray]:
-        """Create sequences for LSTM training"""
-        X, y = [], []
+        """
+        Create sequences for LSTM training
         
-        for i in range(lookback, len(data)):
-            X.append(data[i-lookback:i, 0])
-            y.append(data[i, 0])
+        Returns:
+            Tuple of (X, y): X holds every window of ``lookback`` values with
+            shape (samples, lookback, 1) and y the value following each window
+        """
+        values = data[:, 0]
+        
+        # Windows are strided views of the series; only the final copy allocates
+        windows = sliding_window_view(values, lookback)[:-1]
         
-        return np.array(X), np.array(y)
+        return np.ascontiguousarray(windows)[..., np.newaxis], values[lookback:]
     
     def _aggregate_customer_loads(self, customer_data: Dict[str, pd.DataFrame]) -> Optional[pd.DataFrame]:
-        """Aggregate loads from multiple customers"""
-        all_data = []
+        """
+        Aggregate loads from multiple customers
+        
+        Readings of all customers are summed per timestamp. The timestamps
+        are factorized once in sorted order and the loads summed with a
+        weighted bincount, without building a combined DataFrame.
+        """
+        all_times = []
+        all_loads = []
         
         for customer_id, df in customer_data.items():
             if df is None or len(df) == 0:
@@ -628,21 +1138,24 @@ class LoadForecaster:
             if 'datetime' not in df.columns:
                 continue
             
-            temp_df = df[['datetime', load_col]].copy()
-            temp_df['datetime'] = pd.to_datetime(temp_df['datetime'])
-            temp_df['load_kw'] = pd.to_numeric(temp_df[load_col], errors='coerce')
-            temp_df = temp_df.dropna()
+            # to_datetime scans even already-parsed columns, so only call it when needed
+            times = df['datetime']
+            if not pd.api.types.is_datetime64_any_dtype(times):
+                times = pd.to_datetime(times)
+            loads = pd.to_numeric(df[load_col], errors='coerce')
+            valid = (times.notna() & loads.notna()).to_numpy()
             
-            all_data.append(temp_df[['datetime', 'load_kw']])
+            all_times.append(times[valid])
+            all_loads.append(loads.to_numpy(dtype=float)[valid])
         
-        if not all_data:
+        if not all_times:
             return None
         
-        # Merge and aggregate by timestamp
-        combined = pd.concat(all_data)
-        aggregated = combined.groupby('datetime').agg({'load_kw': 'sum'}).reset_index()
+        # Sum readings sharing a timestamp
+        positions, timeline = pd.factorize(pd.concat(all_times, ignore_index=True), sort=True)
+        totals = np.bincount(positions, weights=np.concatenate(all_loads), minlength=len(timeline))
         
-        return aggregated
+        return pd.DataFrame({'datetime': timeline, 'load_kw': totals})
     
     def _prepare_transformer_data_for_forecast(self, transformer_data: pd.DataFrame) -> Optional[pd.DataFrame]:
         """Prepare transformer data for forecasting"""
@@ -667,9 +1180,9 @@ class LoadForecaster:
             # Prepare data
             prepared_df = transformer_data[['datetime', load_col]].copy()
             prepared_df['datetime'] = pd.to_datetime(prepared_df['datetime'])
-            prepared_df['load_kw'] = pd.to_numeric(prepared_df[load_col], errors='coerce')
+            prepared_df['load_kw'] = self._to_load_values(prepared_df[load_col])
             prepared_df = prepared_df.dropna()
-            prepared_df = prepared_df.sort_values('datetime')
+            prepared_df = prepared_df.sort_values('datetime', kind='stable', ignore_index=True)
             
             # Remove duplicates
             prepared_df = prepared_df.drop_duplicates(subset=['datetime'], keep='first')
@@ -1,20 +1,166 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple, Any
-from flask import jsonify
+from typing import Dict, List, NamedTuple, Optional, Tuple, Any
+from flask import current_app, has_request_context, jsonify, request
 from utils import session_data
-from scipy.stats import pearsonr
 # Removed sklearn dependency - using numpy for MSE calculation
 import os
+import re
+import hashlib
+import itertools
+import threading
+import weakref
+from collections import OrderedDict, defaultdict
 from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
 
+# Column names containing any of these are not voltages, even if they mention
+# volts (e.g. volt-ampere ratings)
+_EXCLUDE_RE = re.compile(
+    'CURRENT|KVA|KW|KVARH|KWH|POWER|ENERGY|APPARENT|REACTIVE|ACTIVE|FACTOR|PF|FREQUENCY|HZ'
+)
+
+# Voltage columns must contain this (VOLT, VOLTS, VOLTAGE)
+_VOLTAGE_RE = re.compile('VOLT')
+
+# Customer voltage columns by phase letter, e.g. PHASE_A_INST._VOLTAGE (V)
+_PHASE_VOLTAGE_RE = re.compile(r'PHASE_([ABC])_INST\._VOLTAGE')
+
+# Characters replaced in uploaded file names (anything but word characters, '-' and '.')
+_UNSAFE_FILENAME_RE = re.compile(r'[^\w\-_\.]')
+
+# Text the pandas C engine reads as booleans (see _read_csv_arrow)
+_CSV_BOOLEANS = {'True': True, 'TRUE': True, 'true': True, 'False': False, 'FALSE': False, 'false': False}
+
+# Nanoseconds per minute, for time differences held as int64 nanoseconds
+NS_PER_MINUTE = 60 * 1_000_000_000
+
+# Fixed error responses, pre-encoded as (JSON body, status) exactly as jsonify
+# would write them; see _error_response
+_ERR_INVALID_FEEDER_FORMAT = (b'{"error":"Invalid feeder CSV format. Required: DATE, TIME, and voltage columns"}\n', 400)
+_ERR_NO_FEEDER_UPLOAD = (b'{"error":"Please upload feeder NMD file first"}\n', 400)
+_ERR_NO_CUSTOMER_FILES = (b'{"error":"No valid customer files found"}\n', 400)
+_ERR_SESSION_NOT_FOUND = (b'{"error":"Session not found"}\n', 404)
+_ERR_ANALYSIS_DATA_REQUIRED = (b'{"error":"Both feeder and customer data required"}\n', 400)
+_ERR_VIZ_DATA_REQUIRED = (b'{"error":"Customer and feeder data required"}\n', 400)
+_ERR_CUSTOMER_NOT_FOUND = (b'{"error":"Customer not found"}\n', 404)
+_ERR_NO_ALIGNED_DATA = (b'{"error":"No aligned data found"}\n', 400)
+_ERR_NO_ANALYSIS_RESULTS = (b'{"error":"No analysis results found. Run analysis first."}\n', 400)
+_ERR_NO_ASSIGNMENTS = (b'{"error":"No customer assignments found"}\n', 400)
+
+# Number of serialized visualization payloads kept for repeat requests
+VIZ_CACHE_SIZE = 128
+
+# Content type of visualization payloads sent as an Arrow IPC stream
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+# Process-wide counter stamped on a session whenever its NMD data is uploaded,
+# so cached payloads built from older data are never served
+_data_versions = itertools.count(1)
+
+
+def _json_response(payload: Dict[str, Any]):
+    """
+    JSON response for large payloads, encoded with orjson when it is installed
+    
+    orjson encodes long lists of floats and NumPy values in C. Keys are
+    sorted and dates go through Flask's own encoder, as with jsonify; NaN
+    is written as null. Falls back to jsonify without orjson.
+    """
+    try:
+        import orjson
+    except ImportError:
+        return jsonify(payload)
+    
+    body = orjson.dumps(
+        payload, default=current_app.json.default,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SORT_KEYS
+    )
+    return current_app.response_class(body, mimetype='application/json')
+
+
+def _arrow_stream(columns: Dict[str, np.ndarray], metadata: Dict[str, str]) -> Optional[bytes]:
+    """
+    Encode equal-length columns as an Arrow IPC stream
+    
+    Floats are written as raw 8-byte values and datetimes as timestamps,
+    without building Python lists or text. Returns None when pyarrow is not
+    installed, so callers can fall back to JSON.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+    
+    table = pa.table(columns).replace_schema_metadata(metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _remove_file(path: str):
+    """Delete a file, ignoring it if it is already gone"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _error_response(error: Tuple[bytes, int]):
+    """Response for one of the pre-encoded _ERR_* errors, skipping JSON encoding"""
+    body, status = error
+    return current_app.response_class(body, status=status, mimetype='application/json')
+
+
+class AlignedVoltages(NamedTuple):
+    """Customer readings paired with the closest feeder reading, as parallel arrays"""
+    customer_voltage: np.ndarray
+    feeder_voltage: np.ndarray
+    time_diff_minutes: np.ndarray
+    customer_time: np.ndarray
+    feeder_time: np.ndarray
+
+
+class VoltageSeries(NamedTuple):
+    """Time-sorted readings of one voltage column, prepared once for correlation"""
+    times: np.ndarray
+    voltages: np.ndarray
+    centered: np.ndarray  # voltages minus their mean
+    mean: float
+
+
+class FeederGrid(NamedTuple):
+    """Feeders recorded at the same timestamps, stacked so they are scored together"""
+    feeder_ids: List[str]
+    times: np.ndarray
+    centered: np.ndarray  # readings x feeders, each column centered on its mean
+    means: np.ndarray
+
+
+class StoredFrame:
+    """
+    Parquet file holding a session's feeder data
+    
+    The file is deleted once nothing refers to this object any more (a new
+    upload replaced the session's feeder data, or the session was dropped)
+    or when the process exits.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        weakref.finalize(self, _remove_file, path)
+
+
 class NMDAnalysisProcessor:
     """Handles NMD analysis for feeder-customer correlation and assignment"""
     
     def __init__(self):
         self.upload_folder = 'uploads'
         os.makedirs(self.upload_folder, exist_ok=True)
+        # Serialized visualization payloads and their ETags, least recently used first
+        self._viz_cache = OrderedDict()
+        self._viz_cache_lock = threading.Lock()
     
     def upload_feeder_nmd(self, file, session_id: str):
         """Upload and process NMD feeder CSV file"""
@@ -25,12 +171,12 @@ class NMDAnalysisProcessor:
             file.save(filepath)
             
             # Read and process CSV
-            df = pd.read_csv(filepath)
+            df = self._read_nmd_csv(filepath, feeder=True)
             
             # Detect and validate format
-            feeder_info = self._detect_feeder_format(df)
+            feeder_info = self._detect_format(df)
             if not feeder_info:
-                return jsonify({'error': 'Invalid feeder CSV format. Required: DATE, TIME, and voltage columns'}), 400
+                return _error_response(_ERR_INVALID_FEEDER_FORMAT)
             
             # Process datetime
             df = self._process_datetime(df)
@@ -39,12 +185,13 @@ class NMDAnalysisProcessor:
             if session_id not in session_data:
                 session_data[session_id] = {}
             
+            data_version = next(_data_versions)
             session_data[session_id]['feeder_data'] = {
-                'dataframe': df,
+                **self._store_feeder_dataframe(df, f"{session_id}_feeder_{data_version}"),
                 'info': feeder_info,
-                'filename': filename,
-                'filepath': filepath
+                'filename': filename
             }
+            session_data[session_id]['data_version'] = data_version
             
             # Clean up temporary file
             try:
@@ -68,7 +215,7 @@ class NMDAnalysisProcessor:
         """Upload and process multiple customer CSV files"""
         try:
             if session_id not in session_data:
-                return jsonify({'error': 'Please upload feeder NMD file first'}), 400
+                return _error_response(_ERR_NO_FEEDER_UPLOAD)
             
             customer_data = {}
             total_customers = 0
@@ -83,10 +230,10 @@ class NMDAnalysisProcessor:
                 file.save(filepath)
                 
                 # Read and process CSV
-                df = pd.read_csv(filepath)
+                df = self._read_nmd_csv(filepath, feeder=False)
                 
                 # Detect and validate format
-                customer_info = self._detect_customer_format(df)
+                customer_info = self._detect_format(df, feeder=False)
                 if not customer_info:
                     continue
                 
@@ -110,10 +257,11 @@ class NMDAnalysisProcessor:
                     pass
             
             if not customer_data:
-                return jsonify({'error': 'No valid customer files found'}), 400
+                return _error_response(_ERR_NO_CUSTOMER_FILES)
             
             # Store in session
             session_data[session_id]['customer_data'] = customer_data
+            session_data[session_id]['data_version'] = next(_data_versions)
             
             return jsonify({
                 'success': True,
@@ -129,15 +277,17 @@ class NMDAnalysisProcessor:
         """Perform correlation analysis between customers and feeders"""
         try:
             if session_id not in session_data:
-                return jsonify({'error': 'Session not found'}), 404
+                return _error_response(_ERR_SESSION_NOT_FOUND)
             
             session = session_data[session_id]
             if 'feeder_data' not in session or 'customer_data' not in session:
-                return jsonify({'error': 'Both feeder and customer data required'}), 400
+                return _error_response(_ERR_ANALYSIS_DATA_REQUIRED)
             
-            feeder_df = session['feeder_data']['dataframe']
-            customer_data = session['customer_data']
             feeder_info = session['feeder_data']['info']
+            feeder_df = self.load_feeder_dataframe(
+                session['feeder_data'], ['datetime', 'CUSTOMER_REF', *feeder_info['voltage_columns']]
+            )
+            customer_data = session['customer_data']
             
             # Get all unique feeders from the NMD data
             if 'all_feeder_refs' in feeder_info:
@@ -145,6 +295,12 @@ class NMDAnalysisProcessor:
             else:
                 all_feeders = [feeder_info['feeder_id']]
             
+            # Split the feeder data once instead of filtering it for every customer,
+            # and prepare the arrays used to score customers against each feeder
+            feeder_slices = self._split_feeders(feeder_df, all_feeders)
+            feeder_series = self._feeder_series(feeder_slices, feeder_info['voltage_columns'][0])
+            feeder_grid = self._feeder_grid(feeder_series)
+            
             results = {
                 'assignments': [],
                 'feeder_summary': {},
@@ -157,18 +313,16 @@ class NMDAnalysisProcessor:
                 }
             }
             
+            # Find best feeder match for each customer across all feeders
+            best_matches = self._match_customers(
+                customer_data, feeder_slices, feeder_info['voltage_columns'],
+                all_feeders, feeder_series, feeder_grid
+            )
+            
             # Process each customer
             for customer_id, customer_info in customer_data.items():
                 try:
-                    customer_df = customer_info['dataframe']
-                    customer_voltage_cols = customer_info['info']['voltage_columns']
-                    
-                    # Find best feeder match for this customer across all feeders
-                    best_match = self._find_best_feeder_match_multi(
-                        customer_df, customer_voltage_cols,
-                        feeder_df, feeder_info['voltage_columns'],
-                        all_feeders
-                    )
+                    best_match = best_matches.get(customer_id)
                     
                     if best_match:
                         assignment = {
@@ -237,64 +391,181 @@ class NMDAnalysisProcessor:
         except Exception as e:
             return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
     
-    def _detect_feeder_format(self, df: pd.DataFrame) -> Optional[Dict]:
-        """Detect feeder NMD CSV format - VOLTAGE ONLY for correlation analysis"""
-        info = {
-            'has_date': False,
-            'has_time': False,
-            'voltage_columns': [],
-            'feeder_id': None
-        }
+    def _match_customers(self, customer_data: Dict[str, Dict], feeder_slices: Dict[str, pd.DataFrame],
+                         feeder_cols: List[str], all_feeders: List[str],
+                         feeder_series: Dict[str, Optional[VoltageSeries]],
+                         feeder_grid: Optional[FeederGrid] = None) -> Dict[str, Optional[Dict]]:
+        """
+        Find the best feeder match for every customer
         
-        # Check for DATE and TIME columns
-        if 'DATE' in df.columns and 'TIME' in df.columns:
-            info['has_date'] = True
-            info['has_time'] = True
+        Each customer is scored against all feeders at once (see
+        _score_feeders), so customers are simply matched one after another.
         
-        # Look for voltage columns ONLY - explicitly exclude non-voltage parameters
-        # Columns to EXCLUDE (non-voltage parameters)
-        exclude_keywords = ['CURRENT', 'KVA', 'KW', 'KVARH', 'KWH', 'POWER', 'ENERGY', 
-                           'APPARENT', 'REACTIVE', 'ACTIVE', 'FACTOR', 'PF', 'FREQUENCY', 'HZ']
+        Args:
+            customer_data: Session customer entries keyed by customer ID
+            feeder_slices: Feeder readings split by feeder ID
+            feeder_cols: Feeder voltage columns
+            all_feeders: Feeder IDs to match against
+            feeder_series: Prepared feeder series from _feeder_series
+            feeder_grid: Stacked feeder series from _feeder_grid, if any
+            
+        Returns:
+            Each customer's best match, or None if it could not be matched
+        """
+        matches = {}
+        for customer_id, info in customer_data.items():
+            try:
+                matches[customer_id] = self._find_best_feeder_match_multi(
+                    info['dataframe'], info['info']['voltage_columns'],
+                    feeder_slices, feeder_cols, all_feeders, feeder_series, feeder_grid
+                )
+            except Exception:
+                # Continue with other customers even if one fails
+                matches[customer_id] = None
         
-        # Voltage-specific patterns (must contain one of these)
-        voltage_keywords = ['VOLTAGE', 'VOLT']
+        return matches
+    
+    def _store_feeder_dataframe(self, df: pd.DataFrame, name: str) -> Dict[str, Any]:
+        """
+        Keep the parsed feeder data for later requests
         
-        for col in df.columns:
-            col_upper = col.upper()
-            
-            # Skip if column contains any exclude keyword
-            if any(exclude_word in col_upper for exclude_word in exclude_keywords):
-                continue
-            
-            # Include if column contains voltage keyword
-            if any(voltage_word in col_upper for voltage_word in voltage_keywords):
-                info['voltage_columns'].append(col)
+        The frame is written to a Parquet file in the upload folder so it does
+        not stay in memory for the life of the session; Parquet keeps the
+        dtypes, so nothing is parsed again on reload. The file is deleted with
+        the session entry (see StoredFrame). Without a Parquet engine
+        (pyarrow) installed, or if the frame cannot be written, it is kept in
+        memory as before.
         
-        # Extract feeder ID from data - check CUSTOMER_REF first (for NMD data)
-        if 'CUSTOMER_REF' in df.columns:
-            # For NMD data, CUSTOMER_REF contains feeder information
-            unique_refs = df['CUSTOMER_REF'].dropna().unique()
-            if len(unique_refs) > 0:
-                # Use the first unique feeder reference
-                info['feeder_id'] = str(unique_refs[0]).strip()
-                info['all_feeder_refs'] = [str(ref).strip() for ref in unique_refs]
-            else:
-                info['feeder_id'] = 'FEEDER_001'
-        elif 'FEEDER_ID' in df.columns:
-            info['feeder_id'] = df['FEEDER_ID'].iloc[0] if len(df) > 0 else 'FEEDER_001'
-        elif 'TRANSFORMER_ID' in df.columns:
-            info['feeder_id'] = df['TRANSFORMER_ID'].iloc[0] if len(df) > 0 else 'FEEDER_001'
-        else:
-            info['feeder_id'] = 'FEEDER_001'  # Default
+        Args:
+            df: Parsed feeder data
+            name: File name (without extension), unique per upload
+            
+        Returns:
+            Session entries for load_feeder_dataframe
+        """
+        parquet_path = os.path.join(self.upload_folder, f"{name}.parquet")
+        try:
+            df.to_parquet(parquet_path, index=False)
+        except (ImportError, ValueError, TypeError, OSError):
+            _remove_file(parquet_path)
+            return {'dataframe': df}
         
-        # Validate required components
-        if not (info['has_date'] and info['has_time'] and info['voltage_columns']):
-            return None
+        return {'parquet': StoredFrame(parquet_path), 'columns': list(df.columns)}
+    
+    def load_feeder_dataframe(self, feeder_data: Dict[str, Any], columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Feeder NMD data stored by upload_feeder_nmd
         
-        return info
+        Args:
+            feeder_data: The session's 'feeder_data' entry
+            columns: Columns to load from disk (all if None); ignored for
+                data kept in memory
+        """
+        if 'dataframe' in feeder_data:
+            return feeder_data['dataframe']
+        
+        if columns is not None:
+            columns = [col for col in dict.fromkeys(columns) if col in feeder_data['columns']]
+        
+        return pd.read_parquet(feeder_data['parquet'].path, columns=columns)
     
-    def _detect_customer_format(self, df: pd.DataFrame) -> Optional[Dict]:
-        """Detect customer CSV format - VOLTAGE ONLY for correlation analysis"""
+    def _read_nmd_csv(self, filepath: str, feeder: bool) -> pd.DataFrame:
+        """
+        Read an NMD CSV with known column types
+        
+        The header is read first to find the voltage columns. Every column is
+        kept: customer files are exported again as corrected data, and the
+        stored feeder frame is also read by the smart grid routes (GLM
+        generation and load balancing); the matching code loads only the
+        columns it needs (see load_feeder_dataframe). DATE/TIME are read as
+        strings and feeder references as categories, so pandas does not
+        infer types or build an object per value.
+        Voltages are converted to numbers once here (stray text becomes NaN);
+        feeder voltages are stored as float32, which is ample for 3-4
+        significant digits and halves their memory. Customer voltages keep
+        full precision because they are exported unchanged.
+        
+        Files are parsed with pyarrow's multi-threaded reader when pyarrow is
+        installed (see _read_csv_arrow), and with pandas' C engine otherwise.
+        """
+        header = pd.read_csv(filepath, nrows=0).columns
+        
+        # Detection only looks at the column names, so an empty frame is enough
+        info = self._detect_format(pd.DataFrame(columns=header), feeder=False)
+        if not info:
+            return pd.read_csv(filepath)
+        voltage_cols = info['voltage_columns']
+        
+        dtype = {'DATE': 'string', 'TIME': 'string'}
+        if feeder:
+            dtype['CUSTOMER_REF'] = 'category'
+        
+        try:
+            df = self._read_csv_arrow(filepath, header, text_cols=list(dtype)).astype(dtype)
+        except ImportError:
+            df = pd.read_csv(filepath, dtype=dtype)
+        df[voltage_cols] = df[voltage_cols].apply(pd.to_numeric, errors='coerce')
+        if feeder:
+            df[voltage_cols] = df[voltage_cols].astype(np.float32)
+        
+        return df
+    
+    def _read_csv_arrow(self, filepath: str, header: pd.Index, text_cols: List[str]) -> pd.DataFrame:
+        """
+        Read a CSV with pyarrow, typing columns the way pandas' C engine does
+        
+        pandas' own pyarrow engine lets pyarrow infer every column and only
+        then applies the requested dtypes, so references like 0101 become
+        101 and TIME becomes time objects. Here every column is read as text
+        under pandas' header names (duplicates already renamed), then columns
+        other than text_cols are converted to numbers where every value is
+        numeric (or True/False), as the C engine would.
+        
+        Raises:
+            ImportError: pyarrow is not installed
+        """
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+        
+        names = [str(col) for col in header]
+        table = pa_csv.read_csv(
+            filepath,
+            read_options=pa_csv.ReadOptions(column_names=names, skip_rows=1),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={name: pa.string() for name in names},
+                strings_can_be_null=True
+            )
+        )
+        df = table.to_pandas()
+        df.columns = header
+        
+        for col in df.columns:
+            if col in text_cols:
+                continue
+            values = df[col]
+            try:
+                df[col] = pd.to_numeric(values)
+            except (ValueError, TypeError):
+                if values.notna().all() and values.isin(_CSV_BOOLEANS).all():
+                    df[col] = values.map(_CSV_BOOLEANS).astype(bool)
+                else:
+                    # Text column: missing values as NaN, as the C engine leaves them
+                    df[col] = values.fillna(np.nan)
+        
+        return df
+    
+    def _detect_format(self, df: pd.DataFrame, feeder: bool = True) -> Optional[Dict]:
+        """
+        Detect NMD CSV format - VOLTAGE ONLY for correlation analysis
+        
+        Args:
+            df: Uploaded data (only the column names are needed for customer files)
+            feeder: Also identify the feeder(s) the data belongs to
+            
+        Returns:
+            Format info with the voltage columns (and feeder IDs for feeder
+            files), or None if DATE, TIME or voltage columns are missing
+        """
         info = {
             'has_date': False,
             'has_time': False,
@@ -307,24 +578,29 @@ class NMDAnalysisProcessor:
             info['has_time'] = True
         
         # Look for voltage columns ONLY - explicitly exclude non-voltage parameters
-        # Columns to EXCLUDE (non-voltage parameters)
-        exclude_keywords = ['CURRENT', 'KVA', 'KW', 'KVARH', 'KWH', 'POWER', 'ENERGY', 
-                           'APPARENT', 'REACTIVE', 'ACTIVE', 'FACTOR', 'PF', 'FREQUENCY', 'HZ']
-        
-        # Voltage-specific patterns (must contain one of these)
-        voltage_keywords = ['VOLTAGE', 'VOLT']
-        
         for col in df.columns:
             col_upper = col.upper()
-            
-            # Skip if column contains any exclude keyword
-            if any(exclude_word in col_upper for exclude_word in exclude_keywords):
-                continue
-            
-            # Include if column contains voltage keyword
-            if any(voltage_word in col_upper for voltage_word in voltage_keywords):
+            if _VOLTAGE_RE.search(col_upper) and not _EXCLUDE_RE.search(col_upper):
                 info['voltage_columns'].append(col)
         
+        if feeder:
+            # Extract feeder ID from data - check CUSTOMER_REF first (for NMD data)
+            if 'CUSTOMER_REF' in df.columns:
+                # For NMD data, CUSTOMER_REF contains feeder information
+                unique_refs = df['CUSTOMER_REF'].dropna().unique()
+                if len(unique_refs) > 0:
+                    # Use the first unique feeder reference
+                    info['feeder_id'] = str(unique_refs[0]).strip()
+                    info['all_feeder_refs'] = [str(ref).strip() for ref in unique_refs]
+                else:
+                    info['feeder_id'] = 'FEEDER_001'
+            elif 'FEEDER_ID' in df.columns:
+                info['feeder_id'] = df['FEEDER_ID'].iloc[0] if len(df) > 0 else 'FEEDER_001'
+            elif 'TRANSFORMER_ID' in df.columns:
+                info['feeder_id'] = df['TRANSFORMER_ID'].iloc[0] if len(df) > 0 else 'FEEDER_001'
+            else:
+                info['feeder_id'] = 'FEEDER_001'  # Default
+        
         # Validate required components
         if not (info['has_date'] and info['has_time'] and info['voltage_columns']):
             return None
@@ -335,22 +611,19 @@ class NMDAnalysisProcessor:
         """Process DATE and TIME columns into datetime"""
         if 'DATE' in df.columns and 'TIME' in df.columns:
             try:
-                # Combine DATE and TIME
-                combined_datetime = df['DATE'].astype(str) + ' ' + df['TIME'].astype(str)
-                
-                # Try different date formats
-                for date_format in ['%d/%m/%Y %H:%M:%S', '%m/%d/%Y %H:%M:%S', '%Y-%m-%d %H:%M:%S']:
-                    try:
-                        df['datetime'] = pd.to_datetime(combined_datetime, format=date_format)
-                        break
-                    except:
-                        continue
-                else:
+                try:
+                    # Parse DATE and TIME separately; both repeat heavily, so each
+                    # distinct value is parsed once
+                    df['datetime'] = self._parse_dates(df['DATE']) + self._parse_times(df['TIME'])
+                except (ValueError, TypeError):
                     # Fallback to pandas automatic parsing with dayfirst=True for DD/MM/YYYY format
+                    combined_datetime = df['DATE'].astype(str) + ' ' + df['TIME'].astype(str)
                     df['datetime'] = pd.to_datetime(combined_datetime, dayfirst=True, errors='coerce')
                 
-                # Remove rows with invalid datetime
+                # Remove rows with invalid datetime and store the readings in
+                # time order, so the analysis does not have to sort them again
                 df = df.dropna(subset=['datetime'])
+                df = df.sort_values('datetime', kind='stable', ignore_index=True)
                 
             except Exception as e:
                 # Create dummy datetime if parsing fails
@@ -358,6 +631,35 @@ class NMDAnalysisProcessor:
         
         return df
     
+    def _parse_dates(self, dates: pd.Series) -> pd.Series:
+        """
+        Parse a DATE column with the first format that fits every value
+        
+        Raises:
+            ValueError: If no known format fits
+        """
+        for date_format in ['%d/%m/%Y', '%m/%d/%Y', '%Y-%m-%d']:
+            try:
+                return pd.to_datetime(dates, format=date_format, cache=True)
+            except ValueError:
+                continue
+        
+        raise ValueError('Unrecognized DATE format')
+    
+    def _parse_times(self, times: pd.Series) -> pd.Series:
+        """
+        Parse a TIME column (HH:MM:SS) into time-of-day offsets
+        
+        Raises:
+            ValueError: If a value is not a valid time
+        """
+        # Parse each distinct time once; missing values get code -1, which
+        # picks the NaT appended at the end
+        codes, unique_times = pd.factorize(times)
+        offsets = np.append(pd.to_timedelta(np.asarray(unique_times, dtype=str)).to_numpy(), np.timedelta64('NaT'))
+        
+        return pd.Series(offsets[codes], index=times.index)
+    
     def _extract_customer_id(self, filename: str, df: pd.DataFrame) -> str:
         """Extract customer ID from filename or data"""
         # Check if there's a customer ID column in the data first
@@ -380,52 +682,83 @@ class NMDAnalysisProcessor:
         
         return customer_id
     
+    def _split_feeders(self, feeder_df: pd.DataFrame, all_feeders: List[str]) -> Dict[str, pd.DataFrame]:
+        """Split feeder NMD data into one DataFrame per feeder (CUSTOMER_REF) in a single groupby pass"""
+        if 'CUSTOMER_REF' not in feeder_df.columns:
+            return {feeder_id: feeder_df for feeder_id in all_feeders}
+        
+        groups = dict(iter(feeder_df.groupby('CUSTOMER_REF', sort=False, observed=True)))
+        return {feeder_id: groups[feeder_id] for feeder_id in all_feeders if feeder_id in groups}
+    
+    def _feeder_series(self, feeder_slices: Dict[str, pd.DataFrame],
+                       voltage_col: str) -> Dict[str, Optional[VoltageSeries]]:
+        """Prepared series of one voltage column for every feeder"""
+        return {
+            feeder_id: self._clean_series(feeder_data, voltage_col) if 'datetime' in feeder_data.columns else None
+            for feeder_id, feeder_data in feeder_slices.items()
+        }
+    
+    def _feeder_grid(self, feeder_series: Dict[str, Optional[VoltageSeries]]) -> Optional[FeederGrid]:
+        """
+        Stack the feeder series into one matrix if they share their timestamps
+        
+        NMD exports usually record every feeder at the same times. Each
+        customer then needs a single alignment, and all feeders are scored
+        with one matrix product (see _score_feeders). Returns None when there
+        are fewer than two feeders or their timestamps differ.
+        """
+        series = {feeder_id: s for feeder_id, s in feeder_series.items() if s is not None}
+        if len(series) < 2:
+            return None
+        
+        times = next(iter(series.values())).times
+        if any(not np.array_equal(s.times, times) for s in series.values()):
+            return None
+        
+        return FeederGrid(
+            feeder_ids=list(series),
+            times=times,
+            centered=np.column_stack([s.centered for s in series.values()]),
+            means=np.array([s.mean for s in series.values()])
+        )
+    
     def _find_best_feeder_match_multi(self, customer_df: pd.DataFrame, customer_voltage_cols: List[str],
-                                     feeder_df: pd.DataFrame, feeder_voltage_cols: List[str], 
-                                     all_feeders: List[str]) -> Optional[Dict]:
-        """Find the best feeder match for a customer across multiple feeders (Step 1: Feeder Correlation)"""
+                                     feeder_slices: Dict[str, pd.DataFrame], feeder_voltage_cols: List[str], 
+                                     all_feeders: List[str],
+                                     feeder_series: Optional[Dict[str, Any]] = None,
+                                     feeder_grid: Optional[FeederGrid] = None) -> Optional[Dict]:
+        """
+        Find the best feeder match for a customer across multiple feeders (Step 1: Feeder Correlation)
+        
+        feeder_series holds each feeder's prepared first voltage column (see
+        _clean_series), and feeder_grid the same series stacked (see
+        _feeder_grid); pass them when matching many customers so they are
+        built once.
+        """
         best_match = None
         best_score = -1
         
+        # Use simple correlation analysis (first voltage column only)
+        if not customer_voltage_cols or not feeder_voltage_cols or 'datetime' not in customer_df.columns:
+            return None
+        
+        customer_series = self._clean_series(customer_df, customer_voltage_cols[0])
+        if customer_series is None:
+            return None
+        
+        if feeder_series is None:
+            feeder_series = self._feeder_series(feeder_slices, feeder_voltage_cols[0])
+            feeder_grid = self._feeder_grid(feeder_series)
+        
+        # Score every feeder against the customer
+        scores, alignments = self._score_feeders(customer_series, feeder_series, feeder_grid)
+        
         # Step 1: Find the best feeder using simple correlation (no phase analysis yet)
         for feeder_id in all_feeders:
-            # Filter feeder data for this specific feeder
-            feeder_data = feeder_df[feeder_df['CUSTOMER_REF'] == feeder_id] if 'CUSTOMER_REF' in feeder_df.columns else feeder_df
-            
-            if len(feeder_data) == 0:
+            if feeder_id not in scores:
                 continue
             
-            # Use simple correlation analysis (first voltage column only)
-            customer_voltage_col = customer_voltage_cols[0] if customer_voltage_cols else None
-            feeder_voltage_col = feeder_voltage_cols[0] if feeder_voltage_cols else None
-            
-            if not customer_voltage_col or not feeder_voltage_col:
-                continue
-            
-            # Align customer and feeder data by timestamp
-            aligned_data = self._align_timestamps(customer_df, customer_voltage_col, 
-                                                feeder_data, feeder_voltage_col)
-            
-            if aligned_data is None or len(aligned_data) < 10:
-                continue
-            
-            customer_voltage = aligned_data['customer_voltage'].values
-            feeder_voltage = aligned_data['feeder_voltage'].values
-            
-            # Calculate correlation
-            try:
-                correlation, _ = pearsonr(customer_voltage, feeder_voltage)
-                if np.isnan(correlation):
-                    correlation = 0
-            except:
-                correlation = 0
-            
-            # Calculate RMSE using numpy
-            try:
-                mse = np.mean((customer_voltage - feeder_voltage) ** 2)
-                rmse = np.sqrt(mse)
-            except:
-                rmse = float('inf')
+            correlation, rmse, aligned_points = scores[feeder_id]
             
             # Calculate combined score with new formula
             # Normalize RMSE relative to nominal voltage (230V)
@@ -441,15 +774,24 @@ class NMDAnalysisProcessor:
                     'correlation': float(correlation),
                     'rmse': float(rmse),
                     'score': float(score),
-                    'aligned_points': len(aligned_data),
-                    'feeder_data': feeder_data  # Store feeder data for phase analysis
+                    'aligned_points': aligned_points,
+                    'feeder_data': feeder_slices[feeder_id]  # Store feeder data for phase analysis
                 }
         
         if best_match:
+            # Step 1 aligned the first voltage columns. If neither side lost rows
+            # to missing voltages, that pairing covers every row and Step 2 can
+            # reuse it instead of aligning again
+            feeder_id = best_match['feeder_id']
+            alignment = None
+            if (len(customer_series.times) == customer_df['datetime'].count()
+                    and len(feeder_series[feeder_id].times) == best_match['feeder_data']['datetime'].count()):
+                alignment = alignments[feeder_id]
+            
             # Step 2: Now perform phase analysis with the best feeder
             phase_analysis = self._analyze_phase_correlation(
                 customer_df, customer_voltage_cols,
-                best_match['feeder_data'], feeder_voltage_cols
+                best_match['feeder_data'], feeder_voltage_cols, alignment
             )
             
             if phase_analysis:
@@ -459,86 +801,83 @@ class NMDAnalysisProcessor:
         return best_match
     
     def _analyze_phase_correlation(self, customer_df: pd.DataFrame, customer_voltage_cols: List[str],
-                                  feeder_df: pd.DataFrame, feeder_voltage_cols: List[str]) -> Optional[Dict]:
-        """Analyze correlation between customer phases and feeder phases"""
+                                  feeder_df: pd.DataFrame, feeder_voltage_cols: List[str],
+                                  alignment: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Optional[Dict]:
+        """
+        Analyze correlation between customer phases and feeder phases
+        
+        alignment is an already computed (customer_idx, feeder_idx) pairing
+        of the time-sorted rows with a valid datetime (see _nearest_readings);
+        without it the readings are aligned here.
+        """
         try:
-            phase_matches = []
-            best_correlation = -1
-            best_rmse = float('inf')
-            best_aligned_points = 0
-            
-            # For each customer phase
-            for i, customer_voltage_col in enumerate(customer_voltage_cols):
-                customer_phase_name = f"Phase {chr(65 + i)}"  # A, B, C
-                
-                # Test against each feeder phase
-                for j, feeder_voltage_col in enumerate(feeder_voltage_cols):
-                    feeder_phase_name = f"Phase {chr(65 + j)}"  # A, B, C
-                    
-                    # Align customer and feeder data by timestamp
-                    aligned_data = self._align_timestamps(customer_df, customer_voltage_col, 
-                                                        feeder_df, feeder_voltage_col)
-                    
-                    if aligned_data is None or len(aligned_data) < 10:
-                        continue
-                    
-                    customer_voltage = aligned_data['customer_voltage'].values
-                    feeder_voltage = aligned_data['feeder_voltage'].values
-                    
-                    # Calculate correlation
-                    try:
-                        correlation, _ = pearsonr(customer_voltage, feeder_voltage)
-                        if np.isnan(correlation):
-                            correlation = 0
-                    except:
-                        correlation = 0
-                    
-                    # Calculate RMSE using numpy
-                    try:
-                        mse = np.mean((customer_voltage - feeder_voltage) ** 2)
-                        rmse = np.sqrt(mse)
-                    except:
-                        rmse = float('inf')
-                    
-                    # Calculate combined score with new formula
-                    # Normalize RMSE relative to nominal voltage (230V)
-                    normalized_rmse = rmse / 230.0
-                    # New scoring: Score = |r| - 0.5 × RMSE_norm
-                    score = abs(correlation) - (0.5 * normalized_rmse)
-                    
-                    phase_match = {
-                        'customer_phase': customer_phase_name,
-                        'customer_voltage_col': customer_voltage_col,
-                        'feeder_phase': feeder_phase_name,
-                        'feeder_voltage_col': feeder_voltage_col,
-                        'correlation': float(correlation),
-                        'rmse': float(rmse),
-                        'score': float(score),
-                        'aligned_points': len(aligned_data)
-                    }
-                    
-                    phase_matches.append(phase_match)
-                    
-                    # Track best overall metrics
-                    if correlation > best_correlation:
-                        best_correlation = correlation
-                    if rmse < best_rmse:
-                        best_rmse = rmse
-                    if len(aligned_data) > best_aligned_points:
-                        best_aligned_points = len(aligned_data)
-            
-            if not phase_matches:
+            if 'datetime' not in customer_df.columns or 'datetime' not in feeder_df.columns:
+                return None
+            
+            # Align the two series once; every phase pair shares the same timestamps
+            customer_clean = self._time_sorted(customer_df[['datetime', *customer_voltage_cols]].dropna(subset=['datetime']))
+            feeder_clean = self._time_sorted(feeder_df[['datetime', *feeder_voltage_cols]].dropna(subset=['datetime']))
+            
+            if len(customer_clean) == 0 or len(feeder_clean) == 0:
                 return None
             
+            if alignment is not None:
+                customer_idx, feeder_idx = alignment
+            else:
+                customer_idx, feeder_idx, _ = self._nearest_readings(
+                    customer_clean['datetime'].values, feeder_clean['datetime'].values
+                )
+            
+            # Voltage matrices (aligned readings x phases); voltages were made
+            # numeric when the file was read, with missing readings as NaN
+            customer_voltages = customer_clean[customer_voltage_cols].to_numpy(dtype=float)[customer_idx]
+            feeder_voltages = feeder_clean[feeder_voltage_cols].to_numpy(dtype=float)[feeder_idx]
+            
+            correlations, rmses, aligned_counts = self._phase_correlation_matrices(
+                customer_voltages, feeder_voltages
+            )
+            
+            # Calculate combined score with new formula
+            # Normalize RMSE relative to nominal voltage (230V)
+            # New scoring: Score = |r| - 0.5 × RMSE_norm
+            scores = np.abs(correlations) - 0.5 * (rmses / 230.0)
+            
+            # Need minimum aligned points for reliable correlation
+            valid = aligned_counts >= 10
+            if not valid.any():
+                return None
+            
+            # Convert the matrices to Python numbers once rather than per entry
+            correlation_rows, rmse_rows = correlations.tolist(), rmses.tolist()
+            score_rows, count_rows = scores.tolist(), aligned_counts.tolist()
+            
+            # Every customer phase (A, B, C) against every feeder phase
+            phase_matches = [
+                {
+                    'customer_phase': f"Phase {chr(65 + i)}",
+                    'customer_voltage_col': customer_voltage_col,
+                    'feeder_phase': f"Phase {chr(65 + j)}",
+                    'feeder_voltage_col': feeder_voltage_col,
+                    'correlation': correlation_rows[i][j],
+                    'rmse': rmse_rows[i][j],
+                    'score': score_rows[i][j],
+                    'aligned_points': count_rows[i][j]
+                }
+                for i, customer_voltage_col in enumerate(customer_voltage_cols)
+                for j, feeder_voltage_col in enumerate(feeder_voltage_cols)
+                if valid[i, j]
+            ]
+            
             # Determine phase assignments
             phase_assignments = self._determine_phase_assignments(phase_matches, len(customer_voltage_cols))
             
             return {
                 'phase_matches': phase_matches,
                 'phase_assignments': phase_assignments,
-                'best_correlation': float(best_correlation),
-                'best_rmse': float(best_rmse),
-                'best_aligned_points': best_aligned_points
+                # Best overall metrics
+                'best_correlation': float(correlations[valid].max()),
+                'best_rmse': float(rmses[valid].min()),
+                'best_aligned_points': int(aligned_counts[valid].max())
             }
             
         except Exception as e:
@@ -591,155 +930,441 @@ class NMDAnalysisProcessor:
         """Find the best feeder match for a customer based on correlation and RMSE (legacy method)"""
         # Use the multi-feeder method with a single feeder
         return self._find_best_feeder_match_multi(customer_df, customer_voltage_cols, 
-                                                 feeder_df, feeder_voltage_cols, ['FEEDER_001'])
+                                                 self._split_feeders(feeder_df, ['FEEDER_001']),
+                                                 feeder_voltage_cols, ['FEEDER_001'])
     
     def _align_timestamps(self, customer_df: pd.DataFrame, customer_col: str,
                          feeder_df: pd.DataFrame, feeder_col: str, 
-                         time_window_minutes: int = 15) -> Optional[pd.DataFrame]:
-        """Align customer and feeder data by timestamp within time window"""
+                         time_window_minutes: int = 15) -> Optional[AlignedVoltages]:
+        """
+        Align customer and feeder data by timestamp within time window
+        
+        The pairing itself is _nearest_readings: two binary searches over the
+        sorted int64 timestamps, run in NumPy's compiled code, so there is no
+        per-reading loop left to JIT-compile.
+        """
         try:
             # Ensure datetime columns exist
             if 'datetime' not in customer_df.columns or 'datetime' not in feeder_df.columns:
                 return None
             
-            # Clean data - remove NaN values and ensure numeric voltage values
-            customer_clean = customer_df[['datetime', customer_col]].dropna()
-            feeder_clean = feeder_df[['datetime', feeder_col]].dropna()
-            
-            # Convert voltage columns to numeric, removing any non-numeric values
-            customer_clean[customer_col] = pd.to_numeric(customer_clean[customer_col], errors='coerce')
-            feeder_clean[feeder_col] = pd.to_numeric(feeder_clean[feeder_col], errors='coerce')
-            
-            # Remove rows with NaN voltage values
-            customer_clean = customer_clean.dropna()
-            feeder_clean = feeder_clean.dropna()
-            
-            if len(customer_clean) == 0 or len(feeder_clean) == 0:
-                return None
-            
-            # Sort by datetime to ensure proper alignment
-            customer_clean = customer_clean.sort_values('datetime')
-            feeder_clean = feeder_clean.sort_values('datetime')
+            return self._align_series(self._clean_series(customer_df, customer_col),
+                                      self._clean_series(feeder_df, feeder_col), time_window_minutes)
             
-            # Convert to numpy arrays for faster processing
-            customer_times = customer_clean['datetime'].values
-            customer_voltages = customer_clean[customer_col].values
-            feeder_times = feeder_clean['datetime'].values
-            feeder_voltages = feeder_clean[feeder_col].values
-            
-            # Find aligned pairs within time window
-            aligned_pairs = []
-            time_window = pd.Timedelta(minutes=time_window_minutes)
+        except Exception as e:
+            return None
+    
+    def _align_series(self, customer_series: Optional[VoltageSeries], feeder_series: Optional[VoltageSeries],
+                      time_window_minutes: int = 15) -> Optional[AlignedVoltages]:
+        """
+        Align two prepared series (see _clean_series) by timestamp within time window
+        
+        Everything here is NumPy work on plain arrays (binary searches, fancy
+        indexing, arithmetic), which releases the GIL, so requests aligning in
+        separate server threads overlap instead of queueing behind each other.
+        """
+        if customer_series is None or feeder_series is None:
+            return None
+        
+        customer_times, customer_voltages = customer_series.times, customer_series.voltages
+        feeder_times, feeder_voltages = feeder_series.times, feeder_series.voltages
+        
+        # Find aligned pairs within time window
+        customer_idx, feeder_idx, time_diffs = self._nearest_readings(
+            customer_times, feeder_times, time_window_minutes
+        )
+        
+        if len(feeder_idx) < 10:  # Need minimum aligned points for reliable correlation
+            return None
+        
+        return AlignedVoltages(
+            customer_voltage=customer_voltages[customer_idx],
+            feeder_voltage=feeder_voltages[feeder_idx],
+            time_diff_minutes=time_diffs / NS_PER_MINUTE,
+            customer_time=customer_times[customer_idx],
+            feeder_time=feeder_times[feeder_idx]
+        )
+    
+    def _clean_series(self, df: pd.DataFrame, voltage_col: str) -> Optional[VoltageSeries]:
+        """
+        Time-sorted datetime and voltage arrays of one voltage column
+        
+        Rows with a missing time or voltage are dropped. Voltages are numeric
+        from _read_nmd_csv and frames are stored in time order at upload, so
+        this is usually a single dropna. Voltages come back as float64 so sums over them (possibly stored as
+        float32) accumulate in double precision, together with a copy centered
+        on their mean for _centered_pearson_rmse. Returns None if no rows remain.
+        """
+        # Clean data - remove NaN values
+        clean = self._time_sorted(df[['datetime', voltage_col]].dropna())
+        
+        if len(clean) == 0:
+            return None
+        
+        voltages = clean[voltage_col].to_numpy(dtype=float)
+        mean = float(voltages.mean())
+        
+        return VoltageSeries(clean['datetime'].values, voltages, voltages - mean, mean)
+    
+    def _time_sorted(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return df in datetime order, sorting only if it is not stored that way already"""
+        if df['datetime'].is_monotonic_increasing:
+            return df
+        return df.sort_values('datetime', kind='stable')
+    
+    def _score_feeders(self, customer_series: VoltageSeries,
+                       feeder_series: Dict[str, Optional[VoltageSeries]],
+                       feeder_grid: Optional[FeederGrid] = None
+                       ) -> Tuple[Dict[str, Tuple[float, float, int]], Dict[str, Tuple[np.ndarray, np.ndarray]]]:
+        """
+        Correlation, RMSE and aligned point count of a customer against each feeder
+        
+        Also returns the (customer_idx, feeder_idx) pairing behind each score,
+        so the phase analysis of the chosen feeder can reuse it.
+        
+        With a feeder_grid (feeders sharing their timestamps) the customer is
+        aligned once and every feeder is scored by the same matrix product.
+        
+        Otherwise each feeder costs one nearest-reading search and a few
+        reductions over the pre-centered voltages (see _clean_series).
+        Feeders with fewer than 10 aligned points are left out, and so are
+        feeders that provably cannot beat the best score found so far: the
+        RMSE is at least the gap between the customer's and the feeder's
+        voltage ranges and |r| is at most 1, so a feeder scores at most
+        1 - 0.5 * gap / 230. Feeders are tried from the smallest gap up, so
+        the likely winners come first.
+        """
+        if feeder_grid is not None:
+            customer_idx, feeder_idx, _ = self._nearest_readings(customer_series.times, feeder_grid.times)
+            
+            if len(feeder_idx) < 10:  # Need minimum aligned points for reliable correlation
+                return {}, {}
+            
+            correlations, rmses = self._centered_pearson_rmse(
+                customer_series.centered[customer_idx], feeder_grid.centered[feeder_idx],
+                customer_series.mean - feeder_grid.means
+            )
+            scores = {
+                feeder_id: (float(correlation), float(rmse), len(feeder_idx))
+                for feeder_id, correlation, rmse in zip(feeder_grid.feeder_ids, correlations, rmses)
+            }
+            return scores, dict.fromkeys(feeder_grid.feeder_ids, (customer_idx, feeder_idx))
+        
+        customer_min, customer_max = customer_series.voltages.min(), customer_series.voltages.max()
+        
+        range_gaps = {
+            feeder_id: max(0.0, customer_min - series.voltages.max(), series.voltages.min() - customer_max)
+            for feeder_id, series in feeder_series.items()
+            if series is not None
+        }
+        
+        scores = {}
+        alignments = {}
+        best_score = -np.inf
+        
+        for feeder_id in sorted(range_gaps, key=range_gaps.get):
+            if 1.0 - 0.5 * range_gaps[feeder_id] / 230.0 <= best_score:
+                break  # Gaps only grow from here, so no remaining feeder can win
             
-            for i, customer_time in enumerate(customer_times):
-                # Find closest feeder reading within time window
-                time_diffs = np.abs(feeder_times - customer_time)
-                valid_indices = time_diffs <= time_window
-                
-                if np.any(valid_indices):
-                    # Get the closest match
-                    closest_idx = np.argmin(time_diffs[valid_indices])
-                    valid_feeder_indices = np.where(valid_indices)[0]
-                    feeder_idx = valid_feeder_indices[closest_idx]
-                    
-                    # Calculate time difference in minutes
-                    time_diff_minutes = time_diffs[feeder_idx] / np.timedelta64(1, 'm')
-                    
-                    aligned_pairs.append({
-                        'customer_voltage': float(customer_voltages[i]),
-                        'feeder_voltage': float(feeder_voltages[feeder_idx]),
-                        'time_diff_minutes': float(time_diff_minutes),
-                        'customer_time': customer_time,
-                        'feeder_time': feeder_times[feeder_idx]
-                    })
-            
-            if len(aligned_pairs) < 10:  # Need minimum aligned points for reliable correlation
-                return None
+            feeder = feeder_series[feeder_id]
+            customer_idx, feeder_idx, _ = self._nearest_readings(customer_series.times, feeder.times)
             
-            return pd.DataFrame(aligned_pairs)
+            if len(feeder_idx) < 10:  # Need minimum aligned points for reliable correlation
+                continue
             
-        except Exception as e:
-            return None
+            correlation, rmse = self._centered_pearson_rmse(
+                customer_series.centered[customer_idx], feeder.centered[feeder_idx],
+                customer_series.mean - feeder.mean
+            )
+            scores[feeder_id] = (correlation, rmse, len(feeder_idx))
+            alignments[feeder_id] = (customer_idx, feeder_idx)
+            best_score = max(best_score, abs(correlation) - 0.5 * rmse / 230.0)
+        
+        return scores, alignments
+    
+    def _nearest_readings(self, customer_times: np.ndarray, feeder_times: np.ndarray,
+                          time_window_minutes: int = 15) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pair each customer reading with the closest feeder reading in time
+        
+        Both time arrays must be sorted. Returns the customer and feeder
+        indices of the pairs within the time window and their time differences
+        in nanoseconds. The search runs on the int64 nanosecond values, so the
+        window test is a plain integer comparison.
+        
+        This is pd.merge_asof(direction='nearest', tolerance=window) on bare
+        arrays. merge_asof needs DataFrames on both sides, takes about twice
+        as long here, and matches the last of duplicate feeder timestamps
+        rather than the first.
+        """
+        customer_times = customer_times.astype('datetime64[ns]', copy=False).view(np.int64)
+        feeder_times = feeder_times.astype('datetime64[ns]', copy=False).view(np.int64)
+        
+        # The candidates are the feeder readings just before and just after
+        # each customer reading in sorted order
+        last = len(feeder_times) - 1
+        after = np.searchsorted(feeder_times, customer_times).clip(max=last)
+        before = (after - 1).clip(min=0)
+        # On equal distances the earliest reading wins, including among duplicates
+        before = np.searchsorted(feeder_times, feeder_times[before])
+        
+        before_diffs = np.abs(customer_times - feeder_times[before])
+        after_diffs = np.abs(customer_times - feeder_times[after])
+        feeder_idx = np.where(after_diffs < before_diffs, after, before)
+        time_diffs = np.minimum(before_diffs, after_diffs)
+        
+        # Keep pairs within the time window
+        customer_idx = np.flatnonzero(time_diffs <= time_window_minutes * NS_PER_MINUTE)
+        
+        return customer_idx, feeder_idx[customer_idx], time_diffs[customer_idx]
+    
+    def _centered_pearson_rmse(self, x: np.ndarray, y: np.ndarray, offset):
+        """
+        Pearson correlation and RMSE of aligned voltage arrays
+        
+        x and y are selections from series centered once on their full means
+        (VoltageSeries.centered), and offset is the customer mean minus the
+        feeder mean. Both statistics follow from sums and dot products of the
+        selections, so nothing is re-centered or copied per feeder; centering
+        on the full means keeps the sums small and the differences accurate.
+        Unlike scipy's pearsonr there is no input validation or p-value.
+        Correlation is 0 when either side is constant.
+        
+        y may also be a readings x feeders matrix with one offset per column
+        (see FeederGrid); the statistics then come back as arrays, one value
+        per feeder, from a single matrix-vector product.
+        """
+        n = len(x)
+        sum_x, sum_xx = x.sum(), x @ x
+        sum_y, sum_yy, sum_xy = y.sum(axis=0), np.einsum('i...,i...->...', y, y), x @ y
+        
+        var_x = sum_xx - sum_x * sum_x / n
+        var_y = sum_yy - sum_y * sum_y / n
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = (sum_xy - sum_x * sum_y / n) / np.sqrt(var_x * var_y)
+        
+        # Rounding can leave a constant selection with a tiny non-zero variance
+        constant = (var_x <= 1e-12 * sum_xx) | (var_y <= 1e-12 * sum_yy) | ~np.isfinite(correlation)
+        correlation = np.where(constant, 0.0, np.clip(correlation, -1.0, 1.0))
+        
+        # Mean of (x - y + offset)^2, expanded into the same sums
+        mse = (sum_xx + sum_yy - 2 * sum_xy + 2 * offset * (sum_x - sum_y)) / n + offset * offset
+        rmse = np.sqrt(np.maximum(mse, 0.0))
+        
+        if y.ndim == 1:
+            return float(correlation), float(rmse)
+        return correlation, rmse
+    
+    def _phase_correlation_matrices(self, customer_voltages: np.ndarray,
+                                    feeder_voltages: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pearson correlation and RMSE between every customer and feeder phase
+        
+        Both inputs hold aligned readings, one column per phase, with NaN
+        where a reading is missing. Each (customer, feeder) phase pair uses
+        the rows where both readings exist, and all pairwise sums come from
+        a handful of matrix products.
+        
+        Returns:
+            Tuple of (correlation, rmse, aligned point count) matrices of shape
+            (customer phases, feeder phases)
+        """
+        customer_valid = ~np.isnan(customer_voltages)
+        feeder_valid = ~np.isnan(feeder_voltages)
+        
+        # Shift both sides by the same constant to keep the sums well conditioned
+        offset = np.nanmean(feeder_voltages) if feeder_valid.any() else 0.0
+        x = np.where(customer_valid, customer_voltages - offset, 0.0)
+        y = np.where(feeder_valid, feeder_voltages - offset, 0.0)
+        xv = customer_valid.astype(float)
+        yv = feeder_valid.astype(float)
+        
+        n = xv.T @ yv
+        sum_x = x.T @ yv
+        sum_y = xv.T @ y
+        sum_xx = (x * x).T @ yv
+        sum_yy = xv.T @ (y * y)
+        sum_xy = x.T @ y
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = n * sum_xy - sum_x * sum_y
+            var_x = n * sum_xx - sum_x ** 2
+            var_y = n * sum_yy - sum_y ** 2
+            correlation = cov / np.sqrt(var_x * var_y)
+            rmse = np.sqrt(np.maximum(sum_xx - 2 * sum_xy + sum_yy, 0.0) / n)
+        
+        # Constant series have no defined correlation
+        correlation = np.nan_to_num(correlation, nan=0.0, posinf=0.0, neginf=0.0).clip(-1.0, 1.0)
+        
+        return correlation, rmse, n.astype(int)
     
     def _get_time_range(self, df: pd.DataFrame) -> Dict:
-        """Get time range from dataframe"""
+        """Get time range from dataframe (invalid datetimes are dropped at upload)"""
         if 'datetime' in df.columns:
-            min_time = df['datetime'].min()
-            max_time = df['datetime'].max()
+            times = df['datetime'].to_numpy()
+            min_time, max_time = times.min(), times.max()
             return {
-                'min_datetime': min_time.strftime('%Y-%m-%dT%H:%M'),
-                'max_datetime': max_time.strftime('%Y-%m-%dT%H:%M'),
-                'duration_hours': (max_time - min_time).total_seconds() / 3600
+                'min_datetime': np.datetime_as_string(min_time, unit='m'),
+                'max_datetime': np.datetime_as_string(max_time, unit='m'),
+                'duration_hours': float((max_time - min_time) / np.timedelta64(1, 'h'))
             }
         return {}
     
-    def get_visualization_data(self, session_id: str, customer_id: str, feeder_id: str = 'FEEDER_001'):
-        """Get data for visualization of customer vs feeder voltage curves"""
+    def _format_times(self, times: np.ndarray) -> List[str]:
+        """
+        Format datetime64 values as 'YYYY-MM-DD HH:MM:SS' strings
+        
+        np.datetime_as_string formats the whole array in one call instead of
+        boxing each value as a Timestamp; NMD readings are whole seconds, so
+        the result matches str(Timestamp).
+        """
+        return [t.replace('T', ' ') for t in np.datetime_as_string(times, unit='s').tolist()]
+    
+    def get_visualization_data(self, session_id: str, customer_id: str, feeder_id: str = 'FEEDER_001',
+                               output_format: str = 'json'):
+        """
+        Get data for visualization of customer vs feeder voltage curves
+        
+        With output_format='arrow' the aligned series are sent as an Arrow IPC
+        stream (customer/feeder ids in the schema metadata) instead of JSON
+        arrays; without pyarrow installed the JSON payload is sent instead.
+        """
         try:
             if session_id not in session_data:
-                return jsonify({'error': 'Session not found'}), 404
+                return _error_response(_ERR_SESSION_NOT_FOUND)
             
             session = session_data[session_id]
             if 'customer_data' not in session or 'feeder_data' not in session:
-                return jsonify({'error': 'Customer and feeder data required'}), 400
+                return _error_response(_ERR_VIZ_DATA_REQUIRED)
             
             if customer_id not in session['customer_data']:
-                return jsonify({'error': 'Customer not found'}), 404
+                return _error_response(_ERR_CUSTOMER_NOT_FOUND)
+            
+            # Serve repeat requests for unchanged data from the cache
+            cache_key = (session_id, customer_id, feeder_id, output_format, session.get('data_version'))
+            with self._viz_cache_lock:
+                cached = self._viz_cache.get(cache_key)
+                if cached is not None:
+                    self._viz_cache.move_to_end(cache_key)
+            if cached is not None:
+                return self._conditional_response(*cached)
             
             customer_df = session['customer_data'][customer_id]['dataframe']
-            feeder_df = session['feeder_data']['dataframe']
             
             customer_voltage_col = session['customer_data'][customer_id]['info']['voltage_columns'][0]
             feeder_voltage_col = session['feeder_data']['info']['voltage_columns'][0]
             
-            # Filter feeder data for the specific feeder if CUSTOMER_REF column exists
-            if 'CUSTOMER_REF' in feeder_df.columns:
-                feeder_data = feeder_df[feeder_df['CUSTOMER_REF'] == feeder_id]
-                if len(feeder_data) == 0:
+            # Look up the specific feeder's prepared series if the data has a
+            # CUSTOMER_REF column, and align against it
+            feeder_groups = self._feeder_groups(session['feeder_data'])
+            if feeder_groups is not None:
+                if feeder_id not in feeder_groups:
                     return jsonify({'error': f'Feeder {feeder_id} not found in data'}), 404
+                customer_series = (self._clean_series(customer_df, customer_voltage_col)
+                                   if 'datetime' in customer_df.columns else None)
+                aligned_data = self._align_series(customer_series, feeder_groups[feeder_id])
             else:
-                feeder_data = feeder_df
-            
-            # Align data
-            aligned_data = self._align_timestamps(customer_df, customer_voltage_col,
-                                                feeder_data, feeder_voltage_col)
+                feeder_data = self.load_feeder_dataframe(
+                    session['feeder_data'], ['datetime', feeder_voltage_col]
+                )
+                aligned_data = self._align_timestamps(customer_df, customer_voltage_col,
+                                                    feeder_data, feeder_voltage_col)
             
             if aligned_data is None:
-                return jsonify({'error': 'No aligned data found'}), 400
-            
-            # Prepare visualization data with time series
-            viz_data = {
-                'customer_voltage': aligned_data['customer_voltage'].tolist(),
-                'feeder_voltage': aligned_data['feeder_voltage'].tolist(),
-                'time_diffs': aligned_data['time_diff_minutes'].tolist(),
-                'customer_times': [str(t) for t in aligned_data['customer_time']],
-                'feeder_times': [str(t) for t in aligned_data['feeder_time']],
-                'aligned_points': len(aligned_data),
-                'customer_id': customer_id,
-                'feeder_id': feeder_id
-            }
+                return _error_response(_ERR_NO_ALIGNED_DATA)
+            
+            body = None
+            if output_format == 'arrow':
+                body = _arrow_stream({
+                    'customer_voltage': aligned_data.customer_voltage,
+                    'feeder_voltage': aligned_data.feeder_voltage,
+                    'time_diffs': aligned_data.time_diff_minutes,
+                    'customer_times': aligned_data.customer_time,
+                    'feeder_times': aligned_data.feeder_time
+                }, {'customer_id': str(customer_id), 'feeder_id': str(feeder_id)})
+                mimetype = ARROW_STREAM_MIMETYPE
+            
+            if body is None:
+                # Prepare visualization data with time series
+                viz_data = {
+                    'customer_voltage': aligned_data.customer_voltage.tolist(),
+                    'feeder_voltage': aligned_data.feeder_voltage.tolist(),
+                    'time_diffs': aligned_data.time_diff_minutes.tolist(),
+                    'customer_times': self._format_times(aligned_data.customer_time),
+                    'feeder_times': self._format_times(aligned_data.feeder_time),
+                    'aligned_points': len(aligned_data.customer_voltage),
+                    'customer_id': customer_id,
+                    'feeder_id': feeder_id
+                }
+                
+                body = _json_response({
+                    'success': True,
+                    'visualization_data': viz_data
+                }).get_data()
+                mimetype = 'application/json'
             
-            return jsonify({
-                'success': True,
-                'visualization_data': viz_data
-            })
+            etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+            
+            # Sessions without a data version were not filled by the upload
+            # handlers, so there is no way to tell when their data changes
+            if cache_key[-1] is not None:
+                with self._viz_cache_lock:
+                    self._viz_cache[cache_key] = (body, etag, mimetype)
+                    while len(self._viz_cache) > VIZ_CACHE_SIZE:
+                        self._viz_cache.popitem(last=False)
+            
+            return self._conditional_response(body, etag, mimetype)
             
         except Exception as e:
             return jsonify({'error': f'Error getting visualization data: {str(e)}'}), 500
     
+    def _feeder_groups(self, feeder_data: Dict[str, Any]) -> Optional[Dict[str, Optional[VoltageSeries]]]:
+        """
+        Prepared visualization series of every feeder (CUSTOMER_REF)
+        
+        The feeder data is split and cleaned on the first visualization
+        request and kept in the session's 'feeder_data' entry, so later
+        requests look their feeder up instead of scanning the whole frame,
+        and only the customer side is cleaned in pandas per request. A new
+        feeder upload replaces the entry and the groups with it.
+        
+        Returns:
+            Dict of feeder ID -> VoltageSeries (None if it has no usable
+            readings), or None if there is no CUSTOMER_REF column
+        """
+        if 'groups' not in feeder_data:
+            voltage_col = feeder_data['info']['voltage_columns'][0]
+            feeder_df = self.load_feeder_dataframe(feeder_data, ['datetime', 'CUSTOMER_REF', voltage_col])
+            if 'CUSTOMER_REF' in feeder_df.columns:
+                groups = dict(iter(feeder_df.groupby('CUSTOMER_REF', sort=False, observed=True)))
+                feeder_data['groups'] = self._feeder_series(groups, voltage_col)
+            else:
+                feeder_data['groups'] = None
+        
+        return feeder_data['groups']
+    
+    def _conditional_response(self, body: bytes, etag: str, mimetype: str):
+        """Response with an ETag; answers 304 Not Modified if the client already has it"""
+        response = current_app.response_class(body, mimetype=mimetype)
+        response.set_etag(etag)
+        if has_request_context():
+            response = response.make_conditional(request)
+        return response
+    
     def get_analysis_results(self, session_id: str):
         """Get detailed analysis results for display"""
         try:
             if session_id not in session_data:
-                return jsonify({'error': 'Session not found'}), 404
+                return _error_response(_ERR_SESSION_NOT_FOUND)
             
             session = session_data[session_id]
             if 'analysis_results' not in session:
-                return jsonify({'error': 'No analysis results found. Run analysis first.'}), 400
+                return _error_response(_ERR_NO_ANALYSIS_RESULTS)
             
             results = session['analysis_results']
             
-            return jsonify({
+            return _json_response({
                 'success': True,
                 'results': results
             })
@@ -751,22 +1376,22 @@ class NMDAnalysisProcessor:
         """Generate hierarchical network graph visualization data"""
         try:
             if session_id not in session_data:
-                return jsonify({'error': 'Session not found'}), 404
+                return _error_response(_ERR_SESSION_NOT_FOUND)
             
             session = session_data[session_id]
             if 'analysis_results' not in session:
-                return jsonify({'error': 'No analysis results found. Run analysis first.'}), 400
+                return _error_response(_ERR_NO_ANALYSIS_RESULTS)
             
             results = session['analysis_results']
             assignments = results.get('assignments', [])
             
             if not assignments:
-                return jsonify({'error': 'No customer assignments found'}), 400
+                return _error_response(_ERR_NO_ASSIGNMENTS)
             
             # Build hierarchical structure
             graph_data = self._build_hierarchical_graph(assignments, transformer_name)
             
-            return jsonify({
+            return _json_response({
                 'success': True,
                 'graph_data': graph_data
             })
@@ -776,74 +1401,73 @@ class NMDAnalysisProcessor:
     
     def _build_hierarchical_graph(self, assignments: List[Dict], transformer_name: str) -> Dict:
         """Build hierarchical graph structure for visualization"""
-        # Organize data by feeder and phase
-        feeder_structure = {}
+        # Organize data by feeder and phase (feeders are added on first use) as
+        # (customer_id, correlation, score) entries, the fields the nodes show
+        feeder_structure = defaultdict(lambda: {
+            'Phase A': [],
+            'Phase B': [],
+            'Phase C': []
+        })
         
         for assignment in assignments:
             customer_id = assignment['customer_id']
-            feeder_id = assignment['assigned_feeder']
+            phases = feeder_structure[assignment['assigned_feeder']]
             phase_assignments = assignment.get('phase_assignments', [])
             
-            # Initialize feeder if not exists
-            if feeder_id not in feeder_structure:
-                feeder_structure[feeder_id] = {
-                    'Phase A': [],
-                    'Phase B': [],
-                    'Phase C': []
-                }
-            
             # Add customer to appropriate phases
             if phase_assignments:
                 for phase_assignment in phase_assignments:
                     assigned_phase = phase_assignment['assigned_feeder_phase']
-                    if assigned_phase in feeder_structure[feeder_id]:
-                        feeder_structure[feeder_id][assigned_phase].append({
-                            'customer_id': customer_id,
-                            'customer_phase': phase_assignment['customer_phase'],
-                            'correlation': phase_assignment['correlation'],
-                            'score': phase_assignment['score']
-                        })
+                    if assigned_phase in phases:
+                        phases[assigned_phase].append(
+                            (customer_id, phase_assignment['correlation'], phase_assignment['score'])
+                        )
             else:
                 # If no phase assignments, add to Phase A by default
-                feeder_structure[feeder_id]['Phase A'].append({
-                    'customer_id': customer_id,
-                    'correlation': assignment.get('correlation', 0),
-                    'score': assignment.get('score', 0)
-                })
+                phases['Phase A'].append(
+                    (customer_id, assignment.get('correlation', 0), assignment.get('score', 0))
+                )
         
-        # Build nodes and edges for network graph
-        nodes = []
+        # Build nodes and edges for network graph; nodes are keyed by id in
+        # insertion order (a customer on several phases gets one node)
+        nodes_by_id = {}
         edges = []
         node_positions = {}
         
         # Transformer node (root)
-        nodes.append({
+        nodes_by_id['transformer'] = {
             'id': 'transformer',
             'label': transformer_name,
             'type': 'transformer',
             'level': 0,
             'color': '#2C3E50'
-        })
+        }
         
         # Calculate positions
         num_feeders = len(feeder_structure)
         feeder_spacing = 1.0 / (num_feeders + 1)
+        feeder_xs = (np.arange(1, num_feeders + 1) * feeder_spacing).tolist()
+        
+        phase_colors = {
+            'Phase A': '#E74C3C',  # Red
+            'Phase B': '#F39C12',  # Yellow/Orange
+            'Phase C': '#3498DB'   # Blue
+        }
         
-        feeder_index = 0
-        for feeder_id, phases in feeder_structure.items():
-            feeder_index += 1
+        for feeder_index, (feeder_id, phases), feeder_x in zip(
+                itertools.count(1), feeder_structure.items(), feeder_xs):
             feeder_node_id = f'feeder_{feeder_id}'
             
             # Feeder node
-            nodes.append({
+            nodes_by_id[feeder_node_id] = {
                 'id': feeder_node_id,
                 'label': feeder_id,
                 'type': 'feeder',
                 'level': 1,
                 'color': '#7F8C8D',
-                'x': feeder_index * feeder_spacing,
+                'x': feeder_x,
                 'y': 1
-            })
+            }
             
             # Edge from transformer to feeder
             edges.append({
@@ -852,12 +1476,6 @@ class NMDAnalysisProcessor:
             })
             
             # Phase nodes
-            phase_colors = {
-                'Phase A': '#E74C3C',  # Red
-                'Phase B': '#F39C12',  # Yellow/Orange
-                'Phase C': '#3498DB'   # Blue
-            }
-            
             phase_index = 0
             for phase_name, customers in phases.items():
                 if not customers:
@@ -865,17 +1483,19 @@ class NMDAnalysisProcessor:
                     
                 phase_node_id = f'phase_{feeder_id}_{phase_name.replace(" ", "_")}'
                 phase_index += 1
+                # Phase and customer nodes share the phase's column
+                phase_x = (feeder_index - 0.5 + (phase_index - 1) * 0.33) * feeder_spacing
                 
                 # Phase node
-                nodes.append({
+                nodes_by_id[phase_node_id] = {
                     'id': phase_node_id,
                     'label': phase_name,
                     'type': 'phase',
                     'level': 2,
                     'color': phase_colors.get(phase_name, '#95A5A6'),
-                    'x': (feeder_index - 0.5 + (phase_index - 1) * 0.33) * feeder_spacing,
+                    'x': phase_x,
                     'y': 2
-                })
+                }
                 
                 # Edge from feeder to phase
                 edges.append({
@@ -883,49 +1503,53 @@ class NMDAnalysisProcessor:
                     'target': phase_node_id
                 })
                 
-                # Customer nodes
-                customer_index = 0
-                for customer in customers:
-                    customer_node_id = f'customer_{customer["customer_id"]}'
-                    customer_index += 1
-                    
+                # Customer nodes, stacked below the phase in list order
+                phase_customer_ids = [f'customer_{customer_id}' for customer_id, _, _ in customers]
+                customer_ys = (3 + np.arange(1, len(customers) + 1) * 0.15).tolist()
+                for (customer_id, correlation, score), customer_node_id, customer_y in zip(
+                        customers, phase_customer_ids, customer_ys):
                     # Check if customer node already exists
-                    if not any(node['id'] == customer_node_id for node in nodes):
-                        nodes.append({
+                    if customer_node_id not in nodes_by_id:
+                        nodes_by_id[customer_node_id] = {
                             'id': customer_node_id,
-                            'label': str(customer['customer_id']),
+                            'label': str(customer_id),
                             'type': 'customer',
                             'level': 3,
                             'color': '#BDC3C7',
-                            'correlation': customer.get('correlation', 0),
-                            'score': customer.get('score', 0),
-                            'x': (feeder_index - 0.5 + (phase_index - 1) * 0.33) * feeder_spacing,
-                            'y': 3 + customer_index * 0.15
-                        })
-                    
-                    # Edge from phase to customer
-                    edges.append({
-                        'source': phase_node_id,
-                        'target': customer_node_id
-                    })
+                            'correlation': correlation,
+                            'score': score,
+                            'x': phase_x,
+                            'y': customer_y
+                        }
+                
+                # Edges from phase to customers, one per customer even when several
+                # of its phases were matched to this feeder phase
+                edges.extend({'source': phase_node_id, 'target': customer_node_id}
+                             for customer_node_id in dict.fromkeys(phase_customer_ids))
         
         return {
-            'nodes': nodes,
+            'nodes': list(nodes_by_id.values()),
             'edges': edges,
             'transformer': transformer_name,
             'total_feeders': num_feeders,
             'total_customers': len(assignments)
         }
     
-    def generate_corrected_data(self, session_id: str):
-        """Generate corrected customer data with proper phase labels"""
+    def generate_corrected_data(self, session_id: str, layout: str = 'records'):
+        """
+        Generate corrected customer data with proper phase labels
+        
+        Customer data is sent as a list of row records. With layout='columns'
+        it is sent as {column: [values]} instead, which is several times
+        faster to build and smaller to send for long files.
+        """
         try:
             if session_id not in session_data:
-                return jsonify({'error': 'Session not found'}), 404
+                return _error_response(_ERR_SESSION_NOT_FOUND)
             
             session = session_data[session_id]
             if 'analysis_results' not in session or 'customer_data' not in session:
-                return jsonify({'error': 'No analysis results found. Run analysis first.'}), 400
+                return _error_response(_ERR_NO_ANALYSIS_RESULTS)
             
             results = session['analysis_results']
             customer_data = session['customer_data']
@@ -937,27 +1561,35 @@ class NMDAnalysisProcessor:
                 if customer_id not in customer_data:
                     continue
                 
-                customer_df = customer_data[customer_id]['dataframe'].copy()
+                # Only read from here on, so the stored frame is used without a copy
+                customer_df = customer_data[customer_id]['dataframe']
+                columnar = layout == 'columns'
+                original_data = self._columnar(customer_df) if columnar else customer_df.to_dict('records')
                 
                 # Apply phase corrections if phase analysis is available
                 if 'phase_assignments' in assignment:
                     corrected_df = self._apply_phase_corrections(customer_df, assignment['phase_assignments'])
+                    if columnar:
+                        # Same columns in the same order, only relabelled
+                        corrected_data = dict(zip(corrected_df.columns, original_data.values()))
+                    else:
+                        corrected_data = corrected_df.to_dict('records')
                     corrected_customers[customer_id] = {
-                        'original_data': customer_df.to_dict('records'),
-                        'corrected_data': corrected_df.to_dict('records'),
+                        'original_data': original_data,
+                        'corrected_data': corrected_data,
                         'phase_assignments': assignment['phase_assignments'],
                         'filename': customer_data[customer_id]['filename']
                     }
                 else:
                     # No phase corrections available
                     corrected_customers[customer_id] = {
-                        'original_data': customer_df.to_dict('records'),
-                        'corrected_data': customer_df.to_dict('records'),
+                        'original_data': original_data,
+                        'corrected_data': original_data,
                         'phase_assignments': [],
                         'filename': customer_data[customer_id]['filename']
                     }
             
-            return jsonify({
+            return _json_response({
                 'success': True,
                 'corrected_customers': corrected_customers,
                 'total_customers': len(corrected_customers)
@@ -966,43 +1598,51 @@ class NMDAnalysisProcessor:
         except Exception as e:
             return jsonify({'error': f'Error generating corrected data: {str(e)}'}), 500
     
+    def _columnar(self, df: pd.DataFrame) -> Dict[str, list]:
+        """
+        Column name -> list of values, for layout='columns' JSON responses
+        
+        One list per column instead of one dict per row; Series.tolist()
+        converts each column in a single C loop.
+        """
+        return {col: df[col].tolist() for col in df.columns}
+    
     def _apply_phase_corrections(self, customer_df: pd.DataFrame, phase_assignments: List[Dict]) -> pd.DataFrame:
-        """Apply phase corrections to customer data"""
-        corrected_df = customer_df.copy()
+        """
+        Apply phase corrections to customer data
+        
+        Each phase's voltage column is relabelled with its assigned feeder
+        phase. All renames are looked up on the original column names and
+        applied together, so swapped phases (A -> B, B -> A) trade labels
+        instead of the second rename undoing the first.
         
+        Only the labels change, so the returned frame shares its values with
+        customer_df instead of copying them; treat it as read-only.
+        """
+        # Find the customer voltage column for each phase (first match wins)
+        phase_columns = {}
+        for col in customer_df.columns:
+            match = _PHASE_VOLTAGE_RE.search(col)
+            if match:
+                phase_columns.setdefault(f'Phase {match.group(1)}', col)
+        
+        rename_map = {}
         for assignment in phase_assignments:
             customer_phase = assignment['customer_phase']
             assigned_feeder_phase = assignment['assigned_feeder_phase']
-            
-            # Find the customer voltage column for this phase
-            customer_voltage_col = None
-            for col in corrected_df.columns:
-                if 'PHASE_A_INST._VOLTAGE' in col and customer_phase == 'Phase A':
-                    customer_voltage_col = col
-                    break
-                elif 'PHASE_B_INST._VOLTAGE' in col and customer_phase == 'Phase B':
-                    customer_voltage_col = col
-                    break
-                elif 'PHASE_C_INST._VOLTAGE' in col and customer_phase == 'Phase C':
-                    customer_voltage_col = col
-                    break
+            customer_voltage_col = phase_columns.get(customer_phase)
             
             if customer_voltage_col:
                 # Create new column name with corrected phase
-                new_col_name = customer_voltage_col.replace(
+                rename_map[customer_voltage_col] = customer_voltage_col.replace(
                     f'PHASE_{customer_phase.split()[-1]}_INST._VOLTAGE',
                     f'PHASE_{assigned_feeder_phase.split()[-1]}_INST._VOLTAGE'
                 )
-                
-                # Rename the column
-                corrected_df = corrected_df.rename(columns={customer_voltage_col: new_col_name})
         
-        return corrected_df
-
+        # Rename the columns
+        return customer_df.rename(columns=rename_map, copy=False)
 
 def secure_filename(filename: str) -> str:
     """Secure filename for file uploads"""
-    import re
     # Remove any path separators and keep only alphanumeric, dots, dashes, underscores
-    filename = re.sub(r'[^\w\-_\.]', '_', filename)
-    return filename
+    return _UNSAFE_FILENAME_RE.sub('_', filename)
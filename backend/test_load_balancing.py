@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for the load balancing module
+Run this to check the balancing helpers against reference implementations
+"""
+
+import sys
+import os
+from itertools import combinations
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_balancing import _closest_subset
+
+
+def brute_force_closest(weights, target, max_items):
+    """(distance, item count) of the best subset, trying every combination"""
+    best = (target, 0)  # the empty subset
+    for k in range(1, max_items + 1):
+        for subset in combinations(range(len(weights)), k):
+            if any(weights[i] <= 0 for i in subset):
+                continue
+            distance = abs(sum(weights[i] for i in subset) - target)
+            if distance < best[0]:
+                best = (distance, k)
+    return best
+
+def test_closest_subset_matches_brute_force():
+    """_closest_subset finds the closest sum with the fewest items"""
+    print("Testing _closest_subset...")
+    
+    rng = np.random.default_rng(0)
+    cases = [
+        (np.array([5, 3, 8]), 0, 2),
+        (np.array([5, 3, 8]), 10, 0),
+        (np.array([50, 60]), 10, 2),
+        (np.array([0, -4, 7]), 7, 3),
+        (np.array([4, 4, 4]), 8, 3)
+    ]
+    for _ in range(300):
+        n = int(rng.integers(1, 8))
+        cases.append((rng.integers(-3, 30, n), int(rng.integers(0, 60)), int(rng.integers(0, n + 1))))
+    
+    for weights, target, max_items in cases:
+        chosen = _closest_subset(weights, target, max_items)
+        
+        assert chosen == sorted(set(chosen)), chosen
+        assert len(chosen) <= max_items
+        assert all(weights[i] > 0 for i in chosen)
+        
+        distance = abs(sum(int(weights[i]) for i in chosen) - target) if chosen else target
+        expected = brute_force_closest(weights.tolist(), target, max_items)
+        assert (distance, len(chosen)) == expected, (weights, target, max_items, chosen, expected)
+    
+    print("✓ _closest_subset matches brute force")
+
+def main():
+    """Run all tests"""
+    print("Load Balancing Test Suite")
+    print("=" * 40)
+    
+    all_tests_passed = True
+    
+    for test in (test_closest_subset_matches_brute_force,):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"✗ {test.__name__} failed: {e}")
+            all_tests_passed = False
+    
+    print("\n" + "=" * 40)
+    if all_tests_passed:
+        print("✓ All tests passed!")
+    else:
+        print("✗ Some tests failed. Please check the errors above.")
+    
+    return all_tests_passed
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
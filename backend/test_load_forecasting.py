@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test script for the load forecasting module
+Run this to check the forecasting helpers against reference implementations
+"""
+
+import sys
+import os
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import load_forecasting
+from load_forecasting import LoadForecaster
+
+
+def make_customer_loads(seed, n_customers=3, n_hours=24 * 14):
+    """Hourly customer loads with a daily cycle and noise"""
+    rng = np.random.default_rng(seed)
+    times = pd.date_range('2025-01-01', periods=n_hours, freq='h')
+    daily = 10 * np.sin(np.arange(n_hours) * 2 * np.pi / 24)
+    
+    return {
+        f'C{i}': pd.DataFrame({
+            'datetime': times,
+            'load_kw': 40 + 5 * i + daily + rng.normal(0, 1, n_hours)
+        })
+        for i in range(n_customers)
+    }
+
+def test_forecast_many_feeders_matches_serial():
+    """Parallel feeder forecasts equal forecasting each feeder on its own"""
+    print("Testing forecast_many_feeders...")
+    
+    feeders = {f'F{k}': make_customer_loads(k) for k in range(3)}
+    
+    # Force the thread pool even on single-CPU hosts
+    with mock.patch.object(load_forecasting.os, 'cpu_count', return_value=4):
+        parallel = LoadForecaster().forecast_many_feeders(feeders, 'arima', 24)
+    
+    serial_forecaster = LoadForecaster()
+    serial = {feeder_id: serial_forecaster.forecast_aggregate_load(customers, feeder_id, 'arima', 24)
+              for feeder_id, customers in feeders.items()}
+    
+    assert list(parallel) == list(feeders)
+    for feeder_id, result in parallel.items():
+        assert result['success'], result.get('error')
+        assert result == serial[feeder_id]
+    
+    print("✓ forecast_many_feeders matches serial forecasts")
+
+def test_arima_warm_starts_are_per_session():
+    """Sessions using the same feeder ID don't share ARIMA warm starts, and old keys are evicted"""
+    print("Testing ARIMA warm starts...")
+    
+    forecaster = LoadForecaster()
+    session_a = make_customer_loads(0)
+    session_b = {cid: df.assign(load_kw=df['load_kw'] * 3 + 100) for cid, df in make_customer_loads(1).items()}
+    
+    forecaster.forecast_aggregate_load(session_a, 'FEEDER_001', 'arima', 24, session_id='A')
+    model_a = forecaster._arima_warm_starts[('A', 'FEEDER_001')]['model']
+    forecaster.forecast_aggregate_load(session_b, 'FEEDER_001', 'arima', 24, session_id='B')
+    
+    assert set(forecaster._arima_warm_starts) == {('A', 'FEEDER_001'), ('B', 'FEEDER_001')}
+    assert forecaster._arima_warm_starts[('B', 'FEEDER_001')]['model'] is not model_a
+    assert forecaster._arima_warm_starts[('A', 'FEEDER_001')]['calls'] == 0
+    
+    # Without a session there is nothing to key the warm start on
+    forecaster.forecast_aggregate_load(session_a, 'FEEDER_001', 'arima', 12)
+    assert len(forecaster._arima_warm_starts) == 2
+    
+    with mock.patch.object(load_forecasting, 'ARIMA_WARM_START_SIZE', 2):
+        forecaster.forecast_aggregate_load(make_customer_loads(2), 'FEEDER_001', 'arima', 24, session_id='C')
+    assert list(forecaster._arima_warm_starts) == [('B', 'FEEDER_001'), ('C', 'FEEDER_001')]
+    
+    print("✓ ARIMA warm starts are kept per session")
+
+def test_fit_arima_css_matches_statsmodels():
+    """CSS estimates and forecasts agree with statsmodels' ARIMA on long AR(1)/MA(1)/ARIMA(1,1,1) series"""
+    print("Testing fit_arima_css...")
+    
+    from statsmodels.tsa.arima.model import ARIMA
+    from statsmodels.tsa.arima_process import arma_generate_sample
+    from arima_css import fit_arima_css
+    
+    rng = np.random.default_rng(0)
+    cases = [
+        ((1, 0, 0), [1, -0.6], [1]),
+        ((0, 0, 1), [1], [1, 0.5]),
+        ((1, 1, 1), [1, -0.5], [1, 0.3])
+    ]
+    
+    for order, ar, ma in cases:
+        y = arma_generate_sample(ar, ma, 3000, distrvs=rng.standard_normal)
+        y = np.cumsum(y) if order[1] else y + 10
+        
+        fit = fit_arima_css(y, order)
+        # statsmodels no longer offers CSS; on a series this long the exact
+        # likelihood estimates agree with CSS to well within the tolerance
+        reference = ARIMA(y, order=order, trend='c' if order[1] == 0 else 'n').fit()
+        
+        # Mean (zero when differenced), AR then MA; drop statsmodels' sigma2
+        expected = reference.params[:-1]
+        if order[1]:
+            expected = np.concatenate([[0.0], expected])
+        assert np.allclose(fit.params, expected, atol=0.02), (order, fit.params, expected)
+        assert np.allclose(fit.forecast(10), reference.forecast(10), atol=0.02), order
+        assert len(fit.fittedvalues) == len(y) - order[1]
+        
+        # Reapplying the parameters to the same data reproduces the fit
+        assert np.allclose(fit.apply(y).resid, fit.resid)
+    
+    # Too-short series raise ValueError, which sends _fit_arima to statsmodels
+    try:
+        fit_arima_css(np.arange(4.0), (2, 0, 2))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("short series did not raise ValueError")
+    
+    print("✓ fit_arima_css matches statsmodels ARIMA")
+
+def main():
+    """Run all tests"""
+    print("Load Forecasting Test Suite")
+    print("=" * 40)
+    
+    all_tests_passed = True
+    
+    for test in (test_forecast_many_feeders_matches_serial, test_arima_warm_starts_are_per_session,
+                 test_fit_arima_css_matches_statsmodels):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"✗ {test.__name__} failed: {e}")
+            all_tests_passed = False
+    
+    print("\n" + "=" * 40)
+    if all_tests_passed:
+        print("✓ All tests passed!")
+    else:
+        print("✗ Some tests failed. Please check the errors above.")
+    
+    return all_tests_passed
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -97,6 +97,287 @@ def test_app_integration():
         print(f"✗ App integration test failed: {e}")
         return False
 
+def write_csv(text):
+    """Write CSV text to a temporary file and return its path"""
+    import tempfile
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+        f.write(text)
+    return f.name
+
+# Feeder export with numeric-looking references, an empty cell and extra columns
+FEEDER_CSV = (
+    "DATE,TIME,CUSTOMER_REF,PHASE_A_INST._VOLTAGE (V),KW,NOTE,FLAG,KW\n"
+    "01/01/2025,00:00:00,0101,230.1,1,ok,True,3\n"
+    "01/01/2025,00:00:00,0102,,2,,False,\n"
+    "01/01/2025,00:15:00,0101,231.0,3,NA,True,4.5\n"
+    "01/01/2025,00:15:00,0102,229.4,4,ok,False,5\n"
+)
+
+def test_feeder_upload_keeps_all_columns():
+    """The stored feeder frame keeps the non-voltage columns the smart grid routes read"""
+    print("\nTesting feeder upload columns...")
+    
+    import tempfile
+    import pandas as pd
+    from flask import Flask
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from nmd_analysis import NMDAnalysisProcessor
+    from utils import session_data
+    
+    class Upload:
+        filename = 'feeder.csv'
+        def __init__(self, text):
+            self.text = text
+        def save(self, path):
+            with open(path, 'w') as f:
+                f.write(self.text)
+    
+    feeder_df = pd.DataFrame({
+        'DATE': ['01/01/2025'] * 3,
+        'TIME': ['00:00:00', '00:15:00', '00:30:00'],
+        'CUSTOMER_REF': ['F1', 'F1', 'F2'],
+        'PHASE_A_INST._VOLTAGE (V)': [230.1, 231.0, 229.5],
+        'PHASE_A_INST._CURRENT (A)': [10.0, 11.0, 12.0],
+        'KW': [2.3, 2.5, 2.7]
+    })
+    
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, Flask(__name__).app_context():
+        os.chdir(tmp)
+        try:
+            processor = NMDAnalysisProcessor()
+            processor.upload_feeder_nmd(Upload(feeder_df.to_csv(index=False)), 'columns_test')
+            stored = processor.load_feeder_dataframe(session_data['columns_test']['feeder_data'])
+        finally:
+            os.chdir(cwd)
+            session_data.pop('columns_test', None)
+    
+    for col in feeder_df.columns:
+        assert col in stored.columns, f"{col} missing from the stored feeder data"
+    assert stored['KW'].tolist() == [2.3, 2.5, 2.7]
+    
+    print("✓ Stored feeder data keeps every column")
+
+def test_feeder_parquet_removed_with_session():
+    """The stored feeder Parquet file is deleted when replaced and when the session is dropped"""
+    print("\nTesting stored feeder file cleanup...")
+    
+    try:
+        import pyarrow
+    except ImportError:
+        print("- pyarrow not installed, skipped")
+        return
+    
+    import gc
+    import tempfile
+    from flask import Flask
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from nmd_analysis import NMDAnalysisProcessor
+    from utils import session_data
+    
+    class Upload:
+        filename = 'feeder.csv'
+        def save(self, path):
+            with open(path, 'w') as f:
+                f.write(FEEDER_CSV)
+    
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, Flask(__name__).app_context():
+        os.chdir(tmp)
+        try:
+            processor = NMDAnalysisProcessor()
+            processor.upload_feeder_nmd(Upload(), 'cleanup_test')
+            first = session_data['cleanup_test']['feeder_data']['parquet'].path
+            assert os.listdir('uploads') == [os.path.basename(first)]
+            
+            processor.upload_feeder_nmd(Upload(), 'cleanup_test')
+            second = session_data['cleanup_test']['feeder_data']['parquet'].path
+            gc.collect()
+            assert os.listdir('uploads') == [os.path.basename(second)]
+            
+            session_data.pop('cleanup_test')
+            gc.collect()
+            assert os.listdir('uploads') == []
+        finally:
+            os.chdir(cwd)
+            session_data.pop('cleanup_test', None)
+    
+    print("✓ Stored feeder files are removed with the session")
+
+def test_visualization_arrow_stream():
+    """format=arrow sends the same series as the JSON payload, as a decodable Arrow stream"""
+    print("\nTesting Arrow visualization data...")
+    
+    try:
+        import pyarrow as pa
+    except ImportError:
+        print("- pyarrow not installed, skipped")
+        return
+    
+    import json
+    import tempfile
+    import numpy as np
+    import pandas as pd
+    from flask import Flask
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from nmd_analysis import NMDAnalysisProcessor, ARROW_STREAM_MIMETYPE
+    from utils import session_data
+    
+    class Upload:
+        def __init__(self, filename, text):
+            self.filename = filename
+            self.text = text
+        def save(self, path):
+            with open(path, 'w') as f:
+                f.write(self.text)
+    
+    # 24 feeder readings per feeder, and customer readings a minute later
+    times = pd.date_range('2025-01-01', periods=24, freq='15min')
+    feeder_csv = pd.DataFrame({
+        'DATE': np.tile(times.strftime('%d/%m/%Y'), 2),
+        'TIME': np.tile(times.strftime('%H:%M:%S'), 2),
+        'CUSTOMER_REF': ['0101'] * 24 + ['0102'] * 24,
+        'PHASE_A_INST._VOLTAGE (V)': 230 + np.sin(np.arange(48))
+    }).to_csv(index=False)
+    customer_times = times + pd.Timedelta(minutes=1)
+    customer_csv = pd.DataFrame({
+        'DATE': customer_times.strftime('%d/%m/%Y'),
+        'TIME': customer_times.strftime('%H:%M:%S'),
+        'CUSTOMER_ID': 'C1',
+        'PHASE_A_INST._VOLTAGE (V)': 228 + np.sin(np.arange(24))
+    }).to_csv(index=False)
+    
+    cwd = os.getcwd()
+    app = Flask(__name__)
+    with tempfile.TemporaryDirectory() as tmp, app.test_request_context():
+        os.chdir(tmp)
+        try:
+            processor = NMDAnalysisProcessor()
+            processor.upload_feeder_nmd(Upload('feeder.csv', feeder_csv), 'arrow_test')
+            processor.upload_customer_files([Upload('c1.csv', customer_csv)], 'arrow_test')
+            
+            arrow = processor.get_visualization_data('arrow_test', 'C1', '0101', output_format='arrow')
+            payload = processor.get_visualization_data('arrow_test', 'C1', '0101')
+        finally:
+            os.chdir(cwd)
+            session_data.pop('arrow_test', None)
+    
+    assert arrow.mimetype == ARROW_STREAM_MIMETYPE, arrow.get_data()
+    table = pa.ipc.open_stream(arrow.get_data()).read_all()
+    viz = json.loads(payload.get_data())['visualization_data']
+    
+    assert table.column_names == ['customer_voltage', 'feeder_voltage', 'time_diffs',
+                                  'customer_times', 'feeder_times']
+    assert table.schema.metadata == {b'customer_id': b'C1', b'feeder_id': b'0101'}
+    assert table.num_rows == viz['aligned_points'] == 24
+    for name in ('customer_voltage', 'feeder_voltage', 'time_diffs'):
+        assert np.allclose(table.column(name).to_numpy(), viz[name]), name
+    assert pa.types.is_timestamp(table.schema.field('customer_times').type)
+    
+    print("✓ Arrow stream matches the JSON visualization data")
+
+def test_nearest_readings_matches_loop():
+    """_nearest_readings pairs readings exactly like the original per-reading scan"""
+    print("\nTesting timestamp alignment...")
+    
+    import numpy as np
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from nmd_analysis import NMDAnalysisProcessor
+    
+    def nested_loop(customer_times, feeder_times, time_window_minutes):
+        window = np.timedelta64(time_window_minutes, 'm')
+        pairs = []
+        for i, customer_time in enumerate(customer_times):
+            time_diffs = np.abs(feeder_times - customer_time)
+            valid_indices = time_diffs <= window
+            if np.any(valid_indices):
+                feeder_idx = np.where(valid_indices)[0][np.argmin(time_diffs[valid_indices])]
+                pairs.append((i, feeder_idx, time_diffs[feeder_idx]))
+        return pairs
+    
+    def minutes(values):
+        return np.datetime64('2025-01-01T00:00') + np.array(values, dtype='timedelta64[m]')
+    
+    processor = NMDAnalysisProcessor()
+    rng = np.random.default_rng(0)
+    cases = [
+        # Exactly on the window edge, just outside it, and before/after the feeder data
+        (minutes([0, 15, 16, 100, 130]), minutes([30, 45, 100, 115])),
+        # Equidistant neighbours and duplicate feeder timestamps: earliest wins
+        (minutes([10, 20, 20, 40]), minutes([5, 15, 15, 15, 25, 35, 45])),
+        # A single feeder reading
+        (minutes([-20, 0, 14]), minutes([0])),
+        (minutes([]), minutes([0, 10]))
+    ]
+    for _ in range(50):
+        customer = np.sort(rng.integers(0, 600, rng.integers(1, 80)))
+        feeder = np.sort(rng.integers(0, 600, rng.integers(1, 80)) // 5 * 5)
+        cases.append((minutes(customer), minutes(feeder)))
+    
+    for customer_times, feeder_times in cases:
+        for window in (0, 5, 15):
+            customer_idx, feeder_idx, time_diffs = processor._nearest_readings(
+                customer_times, feeder_times, window
+            )
+            result = [(int(c), int(f), np.timedelta64(int(d), 'ns'))
+                      for c, f, d in zip(customer_idx, feeder_idx, time_diffs)]
+            expected = [(c, int(f), d) for c, f, d in nested_loop(customer_times, feeder_times, window)]
+            assert result == expected, (customer_times, feeder_times, window)
+    
+    print("✓ Timestamp alignment matches the nested loop")
+
+def test_numeric_feeder_refs_match():
+    """Feeder references like 0101 are kept as text, so feeders can be looked up by them"""
+    print("\nTesting numeric feeder references...")
+    
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from nmd_analysis import NMDAnalysisProcessor
+    
+    processor = NMDAnalysisProcessor()
+    path = write_csv(FEEDER_CSV)
+    try:
+        df = processor._read_nmd_csv(path, feeder=True)
+    finally:
+        os.remove(path)
+    
+    info = processor._detect_format(df)
+    assert info['all_feeder_refs'] == ['0101', '0102'], info['all_feeder_refs']
+    assert df['TIME'].tolist() == ['00:00:00', '00:00:00', '00:15:00', '00:15:00']
+    
+    df = processor._process_datetime(df)
+    feeders = processor._split_feeders(df, info['all_feeder_refs'])
+    assert sorted(feeders) == ['0101', '0102'], sorted(feeders)
+    assert len(feeders['0101']) == 2
+    
+    print("✓ Numeric feeder references are matched")
+
+def test_arrow_csv_matches_c_engine():
+    """The pyarrow reader gives the same frame as pandas' C engine"""
+    print("\nTesting pyarrow CSV reader...")
+    
+    try:
+        import pyarrow
+    except ImportError:
+        print("- pyarrow not installed, skipped")
+        return
+    
+    import pandas as pd
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from nmd_analysis import NMDAnalysisProcessor
+    
+    processor = NMDAnalysisProcessor()
+    path = write_csv(FEEDER_CSV)
+    try:
+        header = pd.read_csv(path, nrows=0).columns
+        for dtype in ({'DATE': 'string', 'TIME': 'string'},
+                      {'DATE': 'string', 'TIME': 'string', 'CUSTOMER_REF': 'category'}):
+            arrow = processor._read_csv_arrow(path, header, list(dtype)).astype(dtype)
+            pd.testing.assert_frame_equal(arrow, pd.read_csv(path, dtype=dtype))
+    finally:
+        os.remove(path)
+    
+    print("✓ pyarrow reader matches the C engine")
+
 def create_sample_data():
     """Create sample CSV files for testing"""
     print("\nCreating sample data files...")
@@ -157,6 +438,43 @@ def main():
     if not test_app_integration():
         all_tests_passed = False
     
+    # Feeder upload keeps every column
+    try:
+        test_feeder_upload_keeps_all_columns()
+    except AssertionError as e:
+        print(f"✗ Feeder upload columns test failed: {e}")
+        all_tests_passed = False
+    
+    # Stored feeder files
+    try:
+        test_feeder_parquet_removed_with_session()
+    except AssertionError as e:
+        print(f"✗ Stored feeder file cleanup test failed: {e}")
+        all_tests_passed = False
+    
+    # Arrow visualization data
+    try:
+        test_visualization_arrow_stream()
+    except AssertionError as e:
+        print(f"✗ Arrow visualization test failed: {e}")
+        all_tests_passed = False
+    
+    # Timestamp alignment
+    try:
+        test_nearest_readings_matches_loop()
+    except AssertionError as e:
+        print(f"✗ Timestamp alignment test failed: {e}")
+        all_tests_passed = False
+    
+    # Feeder references and CSV reading
+    for test, name in ((test_numeric_feeder_refs_match, "Numeric feeder reference"),
+                       (test_arrow_csv_matches_c_engine, "pyarrow CSV reader")):
+        try:
+            test()
+        except AssertionError as e:
+            print(f"✗ {name} test failed: {e}")
+            all_tests_passed = False
+    
     # Create sample data
     if not create_sample_data():
         all_tests_passed = False
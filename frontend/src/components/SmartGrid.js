@@ -1568,6 +1568,7 @@ function SmartGrid() {
               >
                 <option value="arima">ARIMA</option>
                 <option value="prophet">Prophet</option>
+                <option value="mstl">MSTL (fast seasonal)</option>
                 <option value="lstm">LSTM</option>
               </select>
             </div>